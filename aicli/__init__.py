@@ -0,0 +1,14 @@
+"""AICLI - A beautiful CLI tool for conversational code assistance."""
+
+import importlib
+
+# Subpackages are imported on first attribute access (PEP 562) to keep startup fast
+_SUBMODULES = {
+    "agent", "cli", "context", "conversation", "editor", "llm", "tools", "utils",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,94 @@
+"""Persistent exact-match cache for final agent responses."""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed cache mapping a hashed request to the agent's final answer."""
+
+    def __init__(self, path: str, ttl: int = 3600):
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from the parts that determine a response."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")  # Keep ("ab", "c") and ("a", "bc") apart
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily, creating it on first use."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "output TEXT NOT NULL, "
+                "tokens INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        """Get a cached (output, tokens) pair, or None on miss or expiry."""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT output, tokens, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            output, tokens, created_at = row
+            if self.ttl and time.time() - created_at > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+
+            return output, tokens
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return None
+
+    def put(self, key: str, output: str, tokens: int = 0) -> None:
+        """Store a response along with the tokens it cost to produce."""
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, output, tokens, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, output, tokens, time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store cached response: {e}")
+
+    def clear(self) -> int:
+        """Remove all cached responses. Returns the number removed."""
+        try:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM responses")
+            conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Could not clear response cache: {e}")
+            return 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,50 @@
+"""LangChain callback handlers used by the AI agent."""
+
+from typing import Any, Callable, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """Accumulate token usage, including prompt-cache hits, across LLM calls."""
+
+    def __init__(self):
+        self.usage: Dict[str, int] = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        """Read standardized usage metadata from each chat generation."""
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if not usage_metadata:
+                    continue
+
+                details = usage_metadata.get("input_token_details") or {}
+                self.usage["input_tokens"] += usage_metadata.get("input_tokens") or 0
+                self.usage["output_tokens"] += usage_metadata.get("output_tokens") or 0
+                self.usage["cache_creation_input_tokens"] += details.get("cache_creation") or 0
+                self.usage["cache_read_input_tokens"] += details.get("cache_read") or 0
+
+    def reset(self) -> None:
+        """Reset accumulated usage."""
+        for key in self.usage:
+            self.usage[key] = 0
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """Forward tokens streamed by the LLM to a callback as they arrive."""
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        """Pass each non-empty token on."""
+        if token:
+            self.on_token(token)
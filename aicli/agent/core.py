@@ -1,41 +1,68 @@
 """Core AI agent implementation using LangChain."""
 
-from typing import Optional, Dict, Any, List
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferMemory
-from langchain.schema import HumanMessage, AIMessage
-from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.tools import Tool
-from langchain import hub
+import asyncio
+import functools
+import logging
+import os
+import re
+from typing import Optional, Dict, Any, List, Tuple
+from langchain.agents import AgentExecutor, create_react_agent, create_tool_calling_agent
+from langchain.memory import ConversationSummaryBufferMemory, ConversationTokenBufferMemory
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain.schema import HumanMessage, AIMessage, SystemMessage, get_buffer_string
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from langchain_core.tools import BaseTool, Tool
 
 from ..llm.factory import LLMFactory
 from ..utils.config import Config
 from ..tools.registry import ToolRegistry
+from .cache import ResponseCache
+from .callbacks import TokenUsageCallbackHandler
+from .executor import ParallelAgentExecutor
 
+logger = logging.getLogger(__name__)
 
-class AIAgent:
-    """Main AI agent for conversational code assistance."""
-    
-    def __init__(self, config: Config):
-        self.config = config
-        self.llm = LLMFactory.create_llm(config.llm)
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            output_key="output"
-        )
-        self.tools = ToolRegistry.get_tools(config)
-        self.agent_executor = self._create_agent()
-    
-    def _create_agent(self) -> AgentExecutor:
-        """Create the LangChain agent executor."""
-        # Use a simpler ReAct agent with proper prompt format
-        try:
-            # Try to get ReAct prompt from hub
-            prompt = hub.pull("hwchase17/react")
-        except:
-            # Fallback to manual prompt creation
-            prompt = PromptTemplate.from_template("""Answer the following questions as best you can. You have access to the following tools:
+_ERROR_PREFIX = "❌ Sorry, I encountered an error: "
+
+# Queries mentioning any of these may need tools; everything else can be
+# answered by the LLM directly without the agent loop. Errs towards the agent.
+_TOOL_INTENT_RE = re.compile(
+    r"\b(?:files?|folders?|director(?:y|ies)|paths?|read|open|show|list|ls|cat|"
+    r"run|execute|exec|tests?|pytest|install|edit|modify|change|fix|refactor|"
+    r"diff|git|commits?|branch(?:es)?|status|log|search|find|grep|look|check|"
+    r"project|repo(?:sitory)?|codebase|this|my|our|here|current)\b"
+    r"|\b[\w-]+\.(?:py|js|ts|tsx|json|ya?ml|toml|md|txt|cfg|ini|sh|go|rs|java|c|h|cpp|html|css)\b"
+    r"|[\w.-]+/[\w.-]+",
+    re.IGNORECASE
+)
+
+ASSISTANT_INSTRUCTIONS = """You are AICLI, a helpful AI assistant for code development and analysis.
+
+You are designed to help developers with:
+- Code review and analysis
+- Refactoring and optimization
+- Bug fixes and debugging
+- Writing new features
+- Explaining complex code
+- Project architecture advice
+- Testing and documentation
+
+Guidelines:
+1. Always provide clear, actionable advice
+2. Include code examples when helpful
+3. Explain your reasoning
+4. Ask clarifying questions when needed
+5. Use available tools to examine files and run code
+6. Be concise but thorough
+7. Focus on best practices and clean code
+
+Always consider the project context and existing code patterns when making suggestions.
+Prioritize security and maintainability in your recommendations."""
+
+
+REACT_PROMPT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
 
 {tools}
 
@@ -50,20 +77,129 @@ Observation: the result of the action
 Thought: I now know the final answer
 Final Answer: the final answer to the original input question
 
+{project_context}
+
+Conversation so far:
+{chat_history}
+
 Begin!
 
 Question: {input}
-Thought:{agent_scratchpad}""")
+Thought:{agent_scratchpad}"""
+
+
+# Hub's "hwchase17/react" plus context and history, shipped locally so
+# startup never waits on the network and works offline
+REACT_PROMPT = PromptTemplate.from_template(REACT_PROMPT_TEMPLATE)
+
+
+@functools.lru_cache(maxsize=2)
+def _get_tool_calling_prompt(cache_checkpoint: bool) -> ChatPromptTemplate:
+    """Build the tool-calling chat prompt once per cache-checkpoint setting."""
+    if cache_checkpoint:
+        # Anthropic caches everything up to the checkpoint, tool definitions included
+        system_message = SystemMessage(content=[{
+            "type": "text",
+            "text": ASSISTANT_INSTRUCTIONS,
+            "cache_control": {"type": "ephemeral"},
+        }])
+    else:
+        # OpenAI-compatible providers cache stable prompt prefixes automatically
+        system_message = SystemMessage(content=ASSISTANT_INSTRUCTIONS)
+    
+    # Dynamic input comes after the static system message so its prefix stays
+    # cacheable; consecutive system messages are merged by the providers
+    return ChatPromptTemplate.from_messages([
+        system_message,
+        MessagesPlaceholder("project_context", optional=True),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", "{input}"),
+        ("placeholder", "{agent_scratchpad}"),
+    ])
+
+
+class AIAgent:
+    """Main AI agent for conversational code assistance."""
+    
+    def __init__(
+        self,
+        config: Config,
+        memory: Optional[BaseChatMemory] = None,
+        tools: Optional[List[BaseTool]] = None,
+        context_entries: Optional[Dict[str, str]] = None
+    ):
+        self.config = config
+        self.llm = LLMFactory.create_llm(config.llm)
+        # Memory, project context and tools may be shared between agents for
+        # different models. Context is kept apart from the memory, which
+        # prunes from the front.
+        self.memory = memory or self._create_memory()
+        self.context_entries: Dict[str, str] = context_entries if context_entries is not None else {}
+        self.tools = tools if tools is not None else ToolRegistry.get_tools(config)
+        self.tool_concurrency_limit = config.agent.tool_concurrency_limit
+        self.usage_handler = TokenUsageCallbackHandler()
+        self.response_cache = self._create_response_cache()
+        self.agent_executor = self._create_agent()
+    
+    def _create_response_cache(self) -> Optional[ResponseCache]:
+        """Create the response cache if enabled."""
+        if not self.config.agent.response_cache:
+            return None
+        return ResponseCache(
+            self.config.agent.response_cache_file,
+            ttl=self.config.agent.response_cache_ttl
+        )
+    
+    def _response_cache_key(self, messages: List[Any]) -> str:
+        """Build the cache key for a direct answer to the given chat messages.
         
-        # Create ReAct agent
-        agent = create_react_agent(
+        The messages carry the instructions, project context, history and
+        query; the working directory keeps projects from sharing answers.
+        """
+        return ResponseCache.make_key(
+            self.config.llm.provider,
+            self.config.llm.model,
+            os.getcwd(),
+            *(f"{message.type}: {message.content}" for message in messages),
+        )
+    
+    def _create_memory(self):
+        """Create token-bounded conversation memory."""
+        memory_config = self.config.memory
+        if memory_config.summarize:
+            # Older turns are folded into a running summary by a (cheaper) model
+            summarizer = self.llm
+            if memory_config.summarizer_llm:
+                summarizer = LLMFactory.create_llm(memory_config.summarizer_llm)
+            return ConversationSummaryBufferMemory(
+                llm=summarizer,
+                max_token_limit=memory_config.window_tokens,
+                memory_key="chat_history",
+                return_messages=True,
+                output_key="output"
+            )
+        
+        return ConversationTokenBufferMemory(
             llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
+            max_token_limit=memory_config.window_tokens,
+            memory_key="chat_history",
+            return_messages=True,
+            output_key="output"
         )
+    
+    def _create_agent(self) -> AgentExecutor:
+        """Create the LangChain agent executor."""
+        if isinstance(self.llm, BaseChatModel):
+            # Chat models emit native tool calls, several per step if independent
+            agent = create_tool_calling_agent(
+                llm=self.llm,
+                tools=self.tools,
+                prompt=self._create_tool_calling_prompt()
+            )
+        else:
+            agent = self._create_react_agent()
         
-        # Create agent executor without memory for now (to avoid conflicts)
-        return AgentExecutor(
+        return ParallelAgentExecutor(
             agent=agent,
             tools=self.tools,
             verbose=self.config.logging.level == "DEBUG",
@@ -71,96 +207,225 @@ Thought:{agent_scratchpad}""")
             handle_parsing_errors=True,
             max_iterations=5,
             max_execution_time=30,
+            tool_concurrency_limit=self.tool_concurrency_limit,
+            serial_tools=frozenset(self.config.agent.serial_tools),
+            max_observation_chars=self.config.agent.max_tool_output_chars,
         )
     
-    def _create_system_prompt(self) -> str:
-        """Create the system prompt for the AI agent."""
-        return """You are AICLI, a helpful AI assistant for code development and analysis.
-
-You are designed to help developers with:
-- Code review and analysis
-- Refactoring and optimization
-- Bug fixes and debugging
-- Writing new features
-- Explaining complex code
-- Project architecture advice
-- Testing and documentation
-
-Guidelines:
-1. Always provide clear, actionable advice
-2. Include code examples when helpful
-3. Explain your reasoning
-4. Ask clarifying questions when needed
-5. Use available tools to examine files and run code
-6. Be concise but thorough
-7. Focus on best practices and clean code
-
-You have access to the following tools:
-{tools}
-
-Use a json blob to specify a tool by providing an action key (tool name) and an action_input key (tool input).
-
-Valid "action" values: "Final Answer" or {tool_names}
-
-Provide only ONE action per $JSON_BLOB, as shown:
-
-```
-{{
-  "action": $TOOL_NAME,
-  "action_input": $INPUT
-}}
-```
-
-Follow this format:
-
-Question: input question to answer
-Thought: consider previous and subsequent steps
-Action:
-```
-$JSON_BLOB
-```
-Observation: action result
-... (Thought/Action/Observation can repeat N times)
-Thought: I know what to respond
-Action:
-```
-{{
-  "action": "Final Answer",
-  "action_input": "Final response to human"
-}}
-```
-
-Always consider the project context and existing code patterns when making suggestions.
-Prioritize security and maintainability in your recommendations."""
+    def _create_tool_calling_prompt(self) -> ChatPromptTemplate:
+        """Create the chat prompt for the tool-calling agent."""
+        return _get_tool_calling_prompt(self.config.llm.provider.lower() == "anthropic")
     
-    def execute(self, query: str, context: Optional[Dict[str, Any]] = None) -> str:
+    def _create_react_agent(self):
+        """Create a text-based ReAct agent for completion-style LLMs."""
+        return create_react_agent(
+            llm=self.llm,
+            tools=self.tools,
+            prompt=REACT_PROMPT
+        )
+    
+    def execute(
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]] = None,
+        callbacks: Optional[List[BaseCallbackHandler]] = None
+    ) -> str:
         """Execute a query with the AI agent."""
+        if self.config.agent.async_tools:
+            # Tools run on an event loop so slow ones overlap instead of blocking
+            return asyncio.run(self.aexecute(query, context, callbacks))
+        
         try:
-            # Prepare input with context if available
-            input_data = {"input": query}
-            if context:
-                input_data.update(context)
+            tokens_before = self._tokens_used()
+            run_config = {"callbacks": [self.usage_handler, *(callbacks or [])]}
             
-            # Execute with agent
-            result = self.agent_executor.invoke(input_data)
+            cache_key = None
+            if self._can_answer_directly(query, context):
+                # No tools needed: one LLM call instead of the agent loop
+                messages = self._direct_messages(query)
+                cache_key, cached = self._lookup_cached_response(query, messages)
+                if cached is not None:
+                    return cached
+                response = self.llm.invoke(messages, config=run_config)
+                result = {"output": getattr(response, "content", response)}
+            else:
+                # Execute with agent
+                result = self.agent_executor.invoke(
+                    self._prepare_input(query, context),
+                    config=run_config
+                )
             
-            # Extract the final answer
-            if isinstance(result, dict) and "output" in result:
-                return result["output"]
+            return self._finish_turn(query, result, cache_key, tokens_before)
+                
+        except Exception as e:
+            return _ERROR_PREFIX + str(e)
+    
+    async def aexecute(
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]] = None,
+        callbacks: Optional[List[BaseCallbackHandler]] = None
+    ) -> str:
+        """Execute a query with the AI agent, running tools asynchronously."""
+        try:
+            tokens_before = self._tokens_used()
+            run_config = {"callbacks": [self.usage_handler, *(callbacks or [])]}
+            
+            cache_key = None
+            if self._can_answer_directly(query, context):
+                messages = self._direct_messages(query)
+                cache_key, cached = self._lookup_cached_response(query, messages)
+                if cached is not None:
+                    return cached
+                response = await self.llm.ainvoke(messages, config=run_config)
+                result = {"output": getattr(response, "content", response)}
             else:
-                return str(result)
+                # Execute with agent
+                result = await self.agent_executor.ainvoke(
+                    self._prepare_input(query, context),
+                    config=run_config
+                )
+            
+            return self._finish_turn(query, result, cache_key, tokens_before)
                 
         except Exception as e:
-            return f"❌ Sorry, I encountered an error: {str(e)}"
+            return _ERROR_PREFIX + str(e)
+    
+    def _can_answer_directly(self, query: str, context: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a query can skip the agent and go straight to the LLM."""
+        if context:
+            return False
+        if not self.tools:
+            return True
+        return self.config.agent.direct_answers and not _TOOL_INTENT_RE.search(query)
+    
+    def _direct_messages(self, query: str) -> List[Any]:
+        """Build the chat messages for answering a query without tools."""
+        # Providers such as Anthropic accept a single leading system message,
+        # so the project context is folded into it
+        system_parts = [ASSISTANT_INSTRUCTIONS]
+        project_context = self._project_context()
+        if project_context:
+            system_parts.append(project_context)
+        
+        return [
+            SystemMessage(content="\n\n".join(system_parts)),
+            *self._chat_history(),
+            HumanMessage(content=query),
+        ]
+    
+    def _prepare_input(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Prepare agent input with project context and history."""
+        project_context = self._project_context()
+        history = self._chat_history()
+        if isinstance(self.llm, BaseChatModel):
+            input_data = {
+                "input": query,
+                "project_context": [SystemMessage(content=project_context)] if project_context else [],
+                "chat_history": history,
+            }
+        else:
+            # The ReAct prompt is plain text
+            input_data = {
+                "input": query,
+                "project_context": project_context or "Project context: (none)",
+                "chat_history": get_buffer_string(history) or "(none)",
+            }
+        
+        if context:
+            input_data.update(context)
+        return input_data
+    
+    def _chat_history(self) -> List[Any]:
+        """Get the remembered turns, including any running summary."""
+        return self.memory.load_memory_variables({})["chat_history"]
+    
+    def _tokens_used(self) -> int:
+        """Get total tokens consumed so far."""
+        usage = self.usage_handler.usage
+        return usage["input_tokens"] + usage["output_tokens"]
+    
+    def _lookup_cached_response(
+        self,
+        query: str,
+        messages: List[Any]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Look up a cached direct answer. Returns (cache_key, cached_output).
+        
+        Only direct answers are cached: agent runs depend on tool results
+        (files, git state, command output) that the key cannot capture.
+        """
+        if not self.response_cache:
+            return None, None
+        
+        cache_key = self._response_cache_key(messages)
+        cached = self.response_cache.get(cache_key)
+        if not cached:
+            return cache_key, None
+        
+        output, tokens = cached
+        logger.info(f"Response cache hit, tokens saved={tokens}")
+        self.memory.save_context({"input": query}, {"output": output})
+        return cache_key, output
+    
+    def _finish_turn(
+        self,
+        query: str,
+        result: Any,
+        cache_key: Optional[str],
+        tokens_before: int
+    ) -> str:
+        """Extract the final answer, cache it and record the turn in memory."""
+        # Extract the final answer
+        try:
+            output = result["output"]
+        except (KeyError, TypeError):
+            output = str(result)
+        
+        if cache_key:
+            self.response_cache.put(cache_key, output, self._tokens_used() - tokens_before)
+        
+        # Record the turn; the memory prunes itself back to its token window
+        self.memory.save_context({"input": query}, {"output": output})
+        return output
+    
+    def add_context(self, context: str, context_type: str = "file", key: Optional[str] = None):
+        """Add context information to the conversation.
+        
+        Entries are deduplicated by key (the content itself by default); adding
+        a context under an existing key replaces it. All entries are sent
+        with every query, outside the token-pruned conversation memory.
+        """
+        self.context_entries[key or context] = f"[{context_type.upper()}] {context}"
+    
+    def _project_context(self) -> str:
+        """Render the project-context entries for the prompt ("" if there are none)."""
+        if not self.context_entries:
+            return ""
+        
+        limit = self.config.memory.max_context_chars
+        entries = []
+        for entry in self.context_entries.values():
+            if len(entry) > limit:
+                # Large dumps (whole files) would crowd chat out of the window
+                entry = entry[:limit] + f"\n... ({len(entry) - limit} more characters omitted)"
+            entries.append(entry)
+        return "Project context:\n" + "\n\n".join(entries)
+    
+    def get_token_usage(self) -> Dict[str, int]:
+        """Get accumulated token usage, including prompt-cache reads and writes."""
+        return dict(self.usage_handler.usage)
     
-    def add_context(self, context: str, context_type: str = "file"):
-        """Add context information to the conversation memory."""
-        context_message = f"[{context_type.upper()}] {context}"
-        self.memory.chat_memory.add_user_message(context_message)
+    def clear_response_cache(self) -> int:
+        """Clear cached responses. Returns the number of entries removed."""
+        if not self.response_cache:
+            return 0
+        return self.response_cache.clear()
     
     def clear_memory(self):
         """Clear the conversation memory."""
         self.memory.clear()
+        self.context_entries.clear()
     
     def get_conversation_history(self) -> List[Dict[str, str]]:
         """Get the conversation history."""
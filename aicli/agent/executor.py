@@ -0,0 +1,167 @@
+"""Agent executor with concurrent tool dispatch."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, FrozenSet, Iterator, Optional, Union
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForChainRun,
+    CallbackManagerForChainRun,
+)
+from langchain_core.tools import BaseTool, ToolException
+from pydantic import PrivateAttr
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor that runs all tool calls of a single step concurrently.
+
+    The stock executor performs the actions of a step one after another, so a
+    step that reads three files costs the sum of three tool latencies. Here the
+    actions are collected first and dispatched as one batch on a thread pool,
+    bounding the step by its slowest tool instead. The async path already
+    gathers a step's actions; it gets the same concurrency limit and error
+    isolation.
+
+    Tools named in serial_tools are not thread-safe (the Python REPL swaps
+    sys.stdout while it runs), so their calls never overlap each other.
+    """
+
+    tool_concurrency_limit: int = 4
+    max_observation_chars: int = 0
+    serial_tools: FrozenSet[str] = frozenset()
+
+    _semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _serial_lock: Optional[asyncio.Lock] = PrivateAttr(default=None)
+    _semaphore_loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(default=None)
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: list,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        """Take a single step, running its tool calls as one batch."""
+        pending = []
+        for item in super()._iter_next_step(
+            name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+        ):
+            if isinstance(item, partial):
+                pending.append(item)
+            else:
+                yield item
+
+        if len(pending) <= 1 or self.tool_concurrency_limit <= 1:
+            for step in pending:
+                yield step()
+            return
+
+        workers = min(self.tool_concurrency_limit, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                None if self._runs_serially(step.args[2]) else pool.submit(step)
+                for step in pending
+            ]
+            # Serial tools run one after another on this thread meanwhile
+            serial_steps = [step() if future is None else None for step, future in zip(pending, futures)]
+            for serial_step, future in zip(serial_steps, futures):
+                yield serial_step if future is None else future.result()
+
+    def _runs_serially(self, agent_action: AgentAction) -> bool:
+        """Check whether an action's tool must not run alongside its own kind."""
+        return agent_action.tool in self.serial_tools
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> partial:
+        """Defer the tool call so the whole step can be dispatched together."""
+        return partial(
+            self._run_agent_action,
+            name_to_tool_map,
+            color_mapping,
+            agent_action,
+            run_manager,
+        )
+
+    def _run_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        """Run one tool call, turning failures into observations for the LLM."""
+        try:
+            step = super()._perform_agent_action(
+                name_to_tool_map, color_mapping, agent_action, run_manager
+            )
+        except Exception as e:
+            # One failing tool must not abort the rest of the batch
+            error = ToolException(f"Tool '{agent_action.tool}' failed: {str(e)}")
+            return AgentStep(action=agent_action, observation=str(error))
+        return self._truncate_observation(step)
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        """Run one tool call on the event loop, bounded by the concurrency limit."""
+        async with self._get_semaphore():
+            try:
+                if self._runs_serially(agent_action):
+                    async with self._get_serial_lock():
+                        step = await super()._aperform_agent_action(
+                            name_to_tool_map, color_mapping, agent_action, run_manager
+                        )
+                else:
+                    step = await super()._aperform_agent_action(
+                        name_to_tool_map, color_mapping, agent_action, run_manager
+                    )
+            except Exception as e:
+                error = ToolException(f"Tool '{agent_action.tool}' failed: {str(e)}")
+                return AgentStep(action=agent_action, observation=str(error))
+        return self._truncate_observation(step)
+
+    def _truncate_observation(self, step: AgentStep) -> AgentStep:
+        """Cap a tool observation, since it is resent on every later iteration."""
+        observation = step.observation
+        limit = self.max_observation_chars
+        if limit <= 0 or not isinstance(observation, str) or len(observation) <= limit:
+            return step
+
+        omitted = len(observation) - limit
+        truncated = (
+            f"{observation[:limit]}\n... ({omitted} more characters omitted; "
+            f"request a narrower range or search for the part you need)"
+        )
+        return AgentStep(action=step.action, observation=truncated)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency semaphore for the running event loop."""
+        self._bind_to_running_loop()
+        return self._semaphore
+
+    def _get_serial_lock(self) -> asyncio.Lock:
+        """Get the lock serializing serial tools on the running event loop."""
+        self._bind_to_running_loop()
+        return self._serial_lock
+
+    def _bind_to_running_loop(self) -> None:
+        """Create the async primitives for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            # Each asyncio.run() call gets a fresh loop and needs its own primitives
+            self._semaphore = asyncio.Semaphore(max(1, self.tool_concurrency_limit))
+            self._serial_lock = asyncio.Lock()
+            self._semaphore_loop = loop
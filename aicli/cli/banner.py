@@ -0,0 +1,45 @@
+"""Startup banner and welcome message for AICLI."""
+
+from typing import Optional
+from rich.console import Console
+from rich.panel import Panel
+from rich.text import Text
+from rich.align import Align
+
+from .theme import get_console
+
+
+def display_banner(console: Optional[Console] = None):
+    """Display the beautiful AICLI startup banner."""
+    console = console or get_console()
+    banner_text = Text()
+    banner_text.append("  ╔═══════════════════════════════════════╗\n", style="cyan bold")
+    banner_text.append("  ║                                       ║\n", style="cyan bold")
+    banner_text.append("  ║            🤖 AICLI v0.1.0           ║\n", style="bright_white bold")
+    banner_text.append("  ║                                       ║\n", style="cyan bold")
+    banner_text.append("  ║    Conversational Code Assistant      ║\n", style="bright_blue")
+    banner_text.append("  ║         Powered by LangChain          ║\n", style="bright_blue")
+    banner_text.append("  ║                                       ║\n", style="cyan bold")
+    banner_text.append("  ╚═══════════════════════════════════════╝", style="cyan bold")
+    
+    panel = Panel(
+        Align.center(banner_text),
+        border_style="bright_cyan",
+        padding=(0, 2),
+    )
+    console.print(panel)
+    console.print()
+
+
+def display_welcome_message(console: Optional[Console] = None):
+    """Display welcome message with helpful tips."""
+    console = console or get_console()
+    welcome_parts = [
+        Text("💡 Welcome to AICLI!", style="bright_yellow bold"),
+        Text("Type your questions in natural language", style="bright_white"),
+        Text("Use '/help' for commands or '/exit' to quit", style="dim"),
+    ]
+    
+    for part in welcome_parts:
+        console.print(Align.center(part))
+    console.print()
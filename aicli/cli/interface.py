@@ -1,8 +1,13 @@
 """Interactive REPL interface for AICLI."""
 
+import atexit
+import re
 import sys
 import readline
-from typing import Optional, List
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Optional, List, Tuple
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
@@ -14,22 +19,93 @@ from rich.spinner import Spinner
 from rich.columns import Columns
 from rich.align import Align
 
-from .theme import AICliTheme
+from .banner import display_banner, display_welcome_message
+from .theme import get_console
 from ..utils.config import Config
+from ..agent.callbacks import StreamingCallbackHandler
 from ..agent.core import AIAgent
+from ..tools.registry import ToolRegistry
+
+# Inline markdown markers anywhere, list markers only at the start of a line
+_MARKDOWN_RE = re.compile(r"[`*#\[\]]|^- |^\d+\. ", re.MULTILINE)
+
+# Number of agents kept warm for quick /model switching
+AGENT_POOL_SIZE = 4
+
+HISTORY_FILE = ".aicli_history"
+# Inputs between incremental history flushes; the full file is written on exit
+HISTORY_FLUSH_INTERVAL = 20
+
+
+class _StreamPreview:
+    """Live renderable showing streamed tokens, or a placeholder until the first one."""
+    
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+        self.tokens: List[str] = []
+    
+    def __rich__(self):
+        # Rendered on Live's refresh tick, not per token
+        if not self.tokens:
+            return self.placeholder
+        return Markdown("".join(self.tokens))
 
 
 class InteractiveInterface:
     """Beautiful interactive REPL interface."""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, console: Optional[Console] = None):
         self.config = config
-        self.console = Console(theme=AICliTheme.get_theme())
-        self.agent = AIAgent(config)
+        self.console = console or get_console()
+        
+        # Tools don't depend on the LLM; memory and project context carry
+        # over model switches
+        self.tools = ToolRegistry.get_tools(config)
+        self.agent = AIAgent(config, tools=self.tools)
+        self.memory = self.agent.memory
+        self.context_entries = self.agent.context_entries
+        self._agent_pool: "OrderedDict[Tuple[str, str], AIAgent]" = OrderedDict()
+        self._agent_pool[(config.llm.provider, config.llm.model)] = self.agent
         self.session_active = True
         self.command_history: List[str] = []
         self._setup_readline()
         
+        # Static prompt pieces, styled once instead of on every turn
+        self._prompt_text = Text.assemble(
+            ("💬 ", "bright_cyan"),
+            ("You", "bright_white bold"),
+            (" › ", "bright_cyan"),
+        )
+        self._ai_header = Text.assemble(
+            ("🤖 ", "bright_blue"),
+            ("AICLI", "bright_blue bold"),
+            (" › ", "bright_blue"),
+        )
+        self._thinking_text = Text.assemble(
+            ("🤖 ", "bright_blue"),
+            ("AICLI", "bright_blue bold"),
+            (" is thinking...", "dim italic"),
+        )
+        self._response_panel = partial(Panel, border_style="bright_blue", padding=(1, 2))
+        
+        # Command dispatch tables, built once instead of scanned per command
+        self._commands = {
+            "/exit": self._handle_exit,
+            "/quit": self._handle_exit,
+            "/q": self._handle_exit,
+            "/help": self._show_help,
+            "/h": self._show_help,
+            "/clear": self._clear_screen,
+            "/cls": self._clear_screen,
+            "/history": self._show_history,
+            "/config": self._show_config,
+        }
+        self._arg_commands = {
+            "/model": self._change_model,
+            "/session": self._handle_session_command,
+            "/cache": self._handle_cache_command,
+        }
+        
     def run(self):
         """Start the interactive REPL."""
         try:
@@ -75,20 +151,39 @@ class InteractiveInterface:
         
         # Load history from previous sessions if it exists
         try:
-            readline.read_history_file(".aicli_history")
+            readline.read_history_file(HISTORY_FILE)
         except FileNotFoundError:
             pass
+        
+        self._unsaved_history = 0
+        atexit.register(self._save_history)
+    
+    def _flush_history(self):
+        """Append history entries added since the last flush."""
+        if not self._unsaved_history:
+            return
+        try:
+            if hasattr(readline, "append_history_file") and Path(HISTORY_FILE).exists():
+                # Writes only the new entries instead of rewriting the whole file
+                readline.append_history_file(self._unsaved_history, HISTORY_FILE)
+            else:
+                readline.write_history_file(HISTORY_FILE)
+            self._unsaved_history = 0
+        except OSError:
+            pass
+    
+    def _save_history(self):
+        """Rewrite the history file once at exit, trimmed to the history length."""
+        try:
+            readline.write_history_file(HISTORY_FILE)
+            self._unsaved_history = 0
+        except OSError:
+            pass
     
     def _get_user_input(self) -> str:
         """Get user input with a beautiful prompt and full navigation support."""
-        # Display the prompt using Rich
-        prompt_text = Text()
-        prompt_text.append("💬 ", style="bright_cyan")
-        prompt_text.append("You", style="bright_white bold")
-        prompt_text.append(" › ", style="bright_cyan")
-        
         # Print the prompt without newline
-        self.console.print(prompt_text, end="")
+        self.console.print(self._prompt_text, end="")
         
         try:
             # Use input() with readline support for full navigation
@@ -97,11 +192,9 @@ class InteractiveInterface:
             # Add to readline history if not empty
             if user_input.strip():
                 readline.add_history(user_input)
-                # Save history to file
-                try:
-                    readline.write_history_file(".aicli_history")
-                except:
-                    pass
+                self._unsaved_history += 1
+                if self._unsaved_history >= HISTORY_FLUSH_INTERVAL:
+                    self._flush_history()
             
             return user_input
         except (EOFError, KeyboardInterrupt):
@@ -110,46 +203,43 @@ class InteractiveInterface:
     
     def _show_ai_response(self, user_input: str):
         """Show AI response with beautiful formatting."""
-        # Create thinking indicator
-        thinking_text = Text()
-        thinking_text.append("🤖 ", style="bright_blue")
-        thinking_text.append("AICLI", style="bright_blue bold")
-        thinking_text.append(" is thinking...", style="dim italic")
+        # Fresh spinner per response so its animation restarts
+        spinner = Spinner("dots", text=self._thinking_text, style="bright_blue")
+        preview = _StreamPreview(spinner)
+        response = None
         
+        # Transient: the streamed preview is replaced by the formatted response
         with Live(
-            Spinner("dots", text=thinking_text, style="bright_blue"),
+            preview,
             console=self.console,
-            refresh_per_second=10
+            refresh_per_second=10,
+            transient=True
         ):
             try:
-                # Get AI response
-                response = self.agent.execute(user_input)
-                
-                # Display AI response
-                self._display_response(response)
+                # Get AI response, streaming tokens into the preview
+                response = self.agent.execute(
+                    user_input,
+                    callbacks=[StreamingCallbackHandler(preview.tokens.append)]
+                )
+            except KeyboardInterrupt:
+                # Abandoning the stream stops generation early
+                self.console.print("⏹️  Response cancelled", style="dim")
             except Exception as e:
                 self.console.print(f"[red]Error: {e}[/red]")
+        
+        if response is not None:
+            # Display AI response
+            self._display_response(response)
     
     def _display_response(self, response: str):
         """Display AI response with beautiful formatting."""
         # AI response header
-        ai_header = Text()
-        ai_header.append("🤖 ", style="bright_blue")
-        ai_header.append("AICLI", style="bright_blue bold")
-        ai_header.append(" › ", style="bright_blue")
-        
-        self.console.print(ai_header, end="")
+        self.console.print(self._ai_header, end="")
         self.console.print()
         
         # Parse and display response with markdown
         if self._looks_like_markdown(response):
-            markdown = Markdown(response)
-            panel = Panel(
-                markdown,
-                border_style="bright_blue",
-                padding=(1, 2),
-            )
-            self.console.print(panel)
+            self.console.print(self._response_panel(Markdown(response)))
         else:
             # Simple text response
             self.console.print(response, style="bright_white")
@@ -158,30 +248,27 @@ class InteractiveInterface:
     
     def _looks_like_markdown(self, text: str) -> bool:
         """Check if text contains markdown formatting."""
-        markdown_indicators = ['```', '`', '**', '*', '#', '- ', '1. ', '[', ']']
-        return any(indicator in text for indicator in markdown_indicators)
+        return _MARKDOWN_RE.search(text) is not None
     
     def _handle_command(self, command: str):
         """Handle special commands starting with /."""
-        command = command.lower().strip()
+        name, _, args = command.strip().partition(" ")
+        name = name.lower()
+        args = args.strip()
         
-        if command in ['/exit', '/quit', '/q']:
-            self._handle_exit()
-        elif command in ['/help', '/h']:
-            self._show_help()
-        elif command in ['/clear', '/cls']:
-            self._clear_screen()
-        elif command in ['/history']:
-            self._show_history()
-        elif command in ['/config']:
-            self._show_config()
-        elif command.startswith('/model '):
-            self._change_model(command[7:])
-        elif command.startswith('/session '):
-            self._handle_session_command(command[9:])
-        else:
-            self.console.print(f"❌ Unknown command: {command}", style="error")
-            self.console.print("💡 Type [bright_cyan]/help[/bright_cyan] for available commands")
+        handler = self._commands.get(name)
+        if handler is not None and not args:
+            handler()
+            return
+        
+        # Arguments keep their case so model and session names survive
+        handler = self._arg_commands.get(name)
+        if handler is not None and args:
+            handler(args)
+            return
+        
+        self.console.print(f"❌ Unknown command: {command.strip()}", style="error")
+        self.console.print("💡 Type [bright_cyan]/help[/bright_cyan] for available commands")
     
     def _handle_exit(self):
         """Handle graceful exit."""
@@ -203,6 +290,7 @@ class InteractiveInterface:
 ## Configuration
 - `/config` - Show current configuration
 - `/model <name>` - Switch LLM model
+- `/cache clear` - Clear cached responses
 
 ## Session Management  
 - `/session save <name>` - Save current session
@@ -228,9 +316,8 @@ class InteractiveInterface:
         """Clear the terminal screen."""
         self.console.clear()
         # Redisplay banner after clearing
-        from .main import display_banner, display_welcome_message
-        display_banner()
-        display_welcome_message()
+        display_banner(self.console)
+        display_welcome_message(self.console)
     
     def _show_history(self):
         """Show command history."""
@@ -257,13 +344,41 @@ class InteractiveInterface:
     
     def _change_model(self, model_name: str):
         """Change the LLM model."""
+        model_name = model_name.strip()
+        previous_model = self.config.llm.model
+        key = (self.config.llm.provider, model_name)
+        
         try:
-            self.config.llm.model = model_name.strip()
-            self.agent = AIAgent(self.config)  # Reinitialize agent
+            self.config.llm.model = model_name
+            agent = self._agent_pool.get(key)
+            if agent is None:
+                agent = AIAgent(
+                    self.config,
+                    memory=self.memory,
+                    tools=self.tools,
+                    context_entries=self.context_entries
+                )
+                self._agent_pool[key] = agent
+                if len(self._agent_pool) > AGENT_POOL_SIZE:
+                    self._agent_pool.popitem(last=False)
+            else:
+                self._agent_pool.move_to_end(key)
+            
+            self.agent = agent
             self.console.print(f"🔄 Switched to model: [bright_cyan]{model_name}[/bright_cyan]")
         except Exception as e:
+            self.config.llm.model = previous_model
             self.console.print(f"❌ Error switching model: {e}", style="error")
     
+    def _handle_cache_command(self, args: str):
+        """Handle response cache commands."""
+        if args.strip() == "clear":
+            removed = self.agent.clear_response_cache()
+            self.console.print(f"🧹 Cleared [bright_cyan]{removed}[/bright_cyan] cached responses")
+        else:
+            self.console.print("❌ Invalid cache command", style="error")
+            self.console.print("💡 Usage: /cache clear")
+    
     def _handle_session_command(self, args: str):
         """Handle session-related commands."""
         parts = args.strip().split()
@@ -5,24 +5,19 @@ import sys
 from pathlib import Path
 from typing import Optional, List
 import typer
-from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from rich.columns import Columns
-from rich.align import Align
 from rich import print as rprint
 from dotenv import load_dotenv
 
 from ..utils.config import Config
 from ..utils.logger import setup_logger
-from .interface import InteractiveInterface
-from .theme import AICliTheme
+from .banner import display_banner, display_welcome_message
+from .theme import get_console
 
 # Load environment variables
 load_dotenv()
 
-# Initialize console with custom theme
-console = Console(theme=AICliTheme.get_theme())
+# Shared console with custom theme
+console = get_console()
 
 # Create Typer app
 app = typer.Typer(
@@ -33,40 +28,6 @@ app = typer.Typer(
 )
 
 
-def display_banner():
-    """Display the beautiful AICLI startup banner."""
-    banner_text = Text()
-    banner_text.append("  ╔═══════════════════════════════════════╗\n", style="cyan bold")
-    banner_text.append("  ║                                       ║\n", style="cyan bold")
-    banner_text.append("  ║            🤖 AICLI v0.1.0           ║\n", style="bright_white bold")
-    banner_text.append("  ║                                       ║\n", style="cyan bold")
-    banner_text.append("  ║    Conversational Code Assistant      ║\n", style="bright_blue")
-    banner_text.append("  ║         Powered by LangChain          ║\n", style="bright_blue")
-    banner_text.append("  ║                                       ║\n", style="cyan bold")
-    banner_text.append("  ╚═══════════════════════════════════════╝", style="cyan bold")
-    
-    panel = Panel(
-        Align.center(banner_text),
-        border_style="bright_cyan",
-        padding=(0, 2),
-    )
-    console.print(panel)
-    console.print()
-
-
-def display_welcome_message():
-    """Display welcome message with helpful tips."""
-    welcome_parts = [
-        Text("💡 Welcome to AICLI!", style="bright_yellow bold"),
-        Text("Type your questions in natural language", style="bright_white"),
-        Text("Use '/help' for commands or '/exit' to quit", style="dim"),
-    ]
-    
-    for part in welcome_parts:
-        console.print(Align.center(part))
-    console.print()
-
-
 @app.command()
 def main(
     query: Optional[str] = typer.Argument(
@@ -174,7 +135,7 @@ def main(
             config.session.resume_session = resume
             
         # Setup logging
-        logger = setup_logger(config.logging.level, config.logging.file)
+        logger = setup_logger(config.logging.level, config.logging.file, console)
         
         if query:
             # Non-interactive mode - execute single query
@@ -188,7 +149,10 @@ def main(
             display_banner()
             display_welcome_message()
             
-            interface = InteractiveInterface(config)
+            # Imported here so `version`/`config` don't pay for loading LangChain
+            from .interface import InteractiveInterface
+            
+            interface = InteractiveInterface(config, console=console)
             interface.run()
             
     except KeyboardInterrupt:
@@ -1,15 +1,28 @@
 """Beautiful Rich theme for AICLI."""
 
+import functools
+from types import MappingProxyType
+from typing import Any, Mapping
+from rich.console import Console
 from rich.theme import Theme
 from rich.style import Style
 
+# Read-only so callers can't change the style for everyone else
+_PROGRESS_STYLE: Mapping[str, Any] = MappingProxyType({
+    "bar_width": 40,
+    "complete_style": "bright_cyan",
+    "finished_style": "bright_green",
+    "pulse_style": "bright_blue",
+})
+
 
 class AICliTheme:
     """Custom theme for AICLI with Claude Code-inspired colors."""
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_theme() -> Theme:
-        """Get the AICLI Rich theme."""
+        """Get the AICLI Rich theme, built once per process."""
         return Theme({
             # Base colors
             "primary": "bright_cyan",
@@ -97,11 +110,12 @@ class AICliTheme:
         return "dots"
     
     @staticmethod  
-    def get_progress_style() -> dict:
-        """Get progress bar styling."""
-        return {
-            "bar_width": 40,
-            "complete_style": "bright_cyan",
-            "finished_style": "bright_green",
-            "pulse_style": "bright_blue",
-        }
\ No newline at end of file
+    def get_progress_style() -> Mapping[str, Any]:
+        """Get progress bar styling (a shared read-only mapping)."""
+        return _PROGRESS_STYLE
+
+
+@functools.lru_cache(maxsize=None)
+def get_console() -> Console:
+    """Get the shared console configured with the AICLI theme."""
+    return Console(theme=AICliTheme.get_theme())
@@ -16,6 +16,7 @@ Future phases will include:
 from .state import (
     ConversationState,
     Message,
+    MessageList,
     MessageRole,
     ConversationStatus,
     TokenUsage,
@@ -35,8 +36,12 @@ from .context_window import (
     ContextWindowManager,
     CompactionStrategy,
     CompactionResult,
+    UtilizationInfo,
+    DEFAULT_STRATEGY,
     TokenCounter,
     SimpleTokenCounter,
+    TiktokenCounter,
+    create_token_counter,
     ConversationCompactor
 )
 
@@ -49,6 +54,7 @@ __all__ = [
     # State management
     'ConversationState',
     'Message',
+    'MessageList',
     'MessageRole',
     'ConversationStatus',
     'TokenUsage',
@@ -66,8 +72,12 @@ __all__ = [
     'ContextWindowManager',
     'CompactionStrategy',
     'CompactionResult',
+    'UtilizationInfo',
+    'DEFAULT_STRATEGY',
     'TokenCounter',
     'SimpleTokenCounter',
+    'TiktokenCounter',
+    'create_token_counter',
     'ConversationCompactor',
     
     # High-level interface
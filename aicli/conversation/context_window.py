@@ -2,9 +2,17 @@
 Context window management with intelligent token counting and auto-compaction.
 """
 import asyncio
+import bisect
+import functools
+import heapq
+import itertools
+import json
 import logging
+import operator
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Callable, Any, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Callable, Any, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
@@ -12,6 +20,17 @@ from .state import ConversationState, Message, MessageRole, TokenUsage
 
 logger = logging.getLogger(__name__)
 
+# Below this many uncounted messages a thread pool costs more than it saves
+PARALLEL_COUNT_THRESHOLD = 256
+PARALLEL_COUNT_WORKERS = 4
+
+# Messages whose token counts are memoized, least recently used dropped first;
+# far more than a context window holds, so only abandoned states are evicted
+TOKEN_CACHE_SIZE = 4096
+
+# Characters of each older message's first line kept in a history digest
+DIGEST_LINE_CHARS = 80
+
 
 class TokenCounter(ABC):
     """Abstract token counter interface."""
@@ -30,11 +49,55 @@ class TokenCounter(ABC):
 class SimpleTokenCounter(TokenCounter):
     """Simple token counter using word approximation."""
     
-    def count_tokens(self, text: str) -> int:
-        """Approximate token count using words * 1.3 ratio."""
+    def __init__(self, cache_size: int = 1024):
+        # Repeated strings (system prompts, metadata values) are split only once
+        self._count_cached = functools.lru_cache(maxsize=cache_size)(self._count_uncached)
+    
+    @staticmethod
+    def _count_uncached(text: str) -> int:
         words = len(text.split())
         return int(words * 1.3)
     
+    def count_tokens(self, text: str) -> int:
+        """Approximate token count using words * 1.3 ratio."""
+        return self._count_cached(text)
+    
+    def count_message_tokens(self, message: Message) -> int:
+        """Count tokens in message including metadata."""
+        base_tokens = self.count_tokens(message.content)
+        
+        # Add tokens for role and metadata, counted in one pass
+        role_tokens = 2
+        metadata_tokens = self.count_tokens(
+            " ".join(map(str, message.metadata.values()))
+        ) if message.metadata else 0
+        
+        # Compact JSON has few word breaks, so estimate tool calls at ~4 chars per token
+        tool_tokens = 0
+        if message.tool_calls:
+            serialized = json.dumps(message.tool_calls, separators=(",", ":"), default=str)
+            tool_tokens = len(serialized) // 4
+        
+        return base_tokens + role_tokens + metadata_tokens + tool_tokens
+
+
+class TiktokenCounter(TokenCounter):
+    """Accurate BPE token counter backed by tiktoken."""
+    
+    def __init__(self, encoding_name: str = "cl100k_base", cache_size: int = 4096):
+        import tiktoken
+        
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        # Per instance, so identical prompts and tool outputs are encoded once
+        self._count_cached = functools.lru_cache(maxsize=cache_size)(self._count_uncached)
+    
+    def _count_uncached(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+    
+    def count_tokens(self, text: str) -> int:
+        """Count BPE tokens in text."""
+        return self._count_cached(text)
+    
     def count_message_tokens(self, message: Message) -> int:
         """Count tokens in message including metadata."""
         base_tokens = self.count_tokens(message.content)
@@ -45,16 +108,33 @@ class SimpleTokenCounter(TokenCounter):
             self.count_tokens(str(v)) for v in message.metadata.values()
         ) if message.metadata else 0
         
-        # Add tokens for tool calls if present
+        # Sorted keys keep the serialized form, and so the cache key, stable
         tool_tokens = 0
         if message.tool_calls:
             for tool_call in message.tool_calls:
-                tool_tokens += self.count_tokens(str(tool_call))
+                tool_tokens += self.count_tokens(json.dumps(tool_call, sort_keys=True, default=str))
         
         return base_tokens + role_tokens + metadata_tokens + tool_tokens
 
 
-@dataclass
+# Set once tiktoken fails so later managers don't retry a missing package or download
+_tiktoken_unavailable = False
+
+
+def create_token_counter() -> TokenCounter:
+    """Create the most accurate available token counter."""
+    global _tiktoken_unavailable
+    if not _tiktoken_unavailable:
+        try:
+            return TiktokenCounter()
+        except Exception as e:
+            # Not installed, or the encoding could not be loaded (e.g. offline)
+            logger.warning(f"tiktoken unavailable, using approximate token counts: {e}")
+            _tiktoken_unavailable = True
+    return SimpleTokenCounter()
+
+
+@dataclass(frozen=True)
 class CompactionStrategy:
     """Configuration for compaction strategy."""
     name: str
@@ -63,6 +143,20 @@ class CompactionStrategy:
     preserve_system_messages: bool = True
     preserve_tool_results: bool = True
     max_compaction_ratio: float = 0.7
+    # User/assistant turns the digest strategy keeps verbatim; None keeps
+    # preserve_recent_messages messages instead
+    window: Optional[int] = None
+
+
+# Immutable, so every manager without an explicit strategy can share it
+DEFAULT_STRATEGY = CompactionStrategy(
+    name="chronological",
+    priority=1,
+    preserve_recent_messages=5,
+    preserve_system_messages=True,
+    preserve_tool_results=True,
+    max_compaction_ratio=0.7
+)
 
 
 class CompactionResult:
@@ -73,29 +167,87 @@ class CompactionResult:
         original_messages: List[Message],
         compacted_messages: List[Message],
         tokens_saved: int,
-        strategy_used: str
+        strategy_used: str,
+        original_tokens: int
     ):
         self.original_messages = original_messages
         self.compacted_messages = compacted_messages
         self.tokens_saved = tokens_saved
         self.strategy_used = strategy_used
-        self.compaction_ratio = tokens_saved / sum(
-            SimpleTokenCounter().count_message_tokens(msg) for msg in original_messages
-        ) if original_messages else 0.0
+        self.original_tokens = original_tokens
+        self.compacted_tokens = original_tokens - tokens_saved
+        self.compaction_ratio = tokens_saved / original_tokens if original_tokens else 0.0
 
 
 class ConversationCompactor:
-    """Handles conversation compaction using various strategies."""
+    """Handles conversation compaction using various strategies.
+    
+    Strategies are plain synchronous functions. A future strategy that does
+    real I/O or heavy work should be offloaded with run_in_executor from
+    ContextWindowManager.compact_conversation rather than made a coroutine.
+    """
     
     def __init__(self, token_counter: TokenCounter):
         self.token_counter = token_counter
+        # Token counts by message identity; messages are immutable, so a count
+        # never goes stale. The message is kept alongside to pin its id.
+        self._token_cache: "OrderedDict[int, Tuple[Message, int]]" = OrderedDict()
         self.strategies = {
             'chronological': self._chronological_compaction,
             'semantic': self._semantic_compaction,
-            'tool_context': self._tool_context_compaction
+            'tool_context': self._tool_context_compaction,
+            'digest': self._digest_compaction
         }
     
-    async def compact(
+    def count_message_tokens(self, message: Message) -> int:
+        """Count tokens in a message, tokenizing each message only once."""
+        cached = self._token_cache.get(id(message))
+        if cached is not None and cached[0] is message:
+            self._token_cache.move_to_end(id(message))
+            return cached[1]
+        
+        tokens = self.token_counter.count_message_tokens(message)
+        self._remember_tokens(message, tokens)
+        return tokens
+    
+    def _remember_tokens(self, message: Message, tokens: int) -> None:
+        """Memoize a message's count, evicting the least recently used beyond the cap."""
+        cache = self._token_cache
+        cache[id(message)] = (message, tokens)
+        cache.move_to_end(id(message))
+        while len(cache) > TOKEN_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def sum_message_tokens(self, messages: List[Message]) -> int:
+        """Sum tokens over messages, tokenizing long uncounted runs in parallel."""
+        self._prime_token_cache(messages)
+        return sum(map(self.count_message_tokens, messages))
+    
+    def _prime_token_cache(self, messages: List[Message]) -> None:
+        """Count uncached messages on a thread pool when the counter releases the GIL."""
+        if len(messages) < PARALLEL_COUNT_THRESHOLD or not isinstance(self.token_counter, TiktokenCounter):
+            return
+        
+        cache = self._token_cache
+        uncached = [
+            msg for msg in messages
+            if cache.get(id(msg), (None, 0))[0] is not msg
+        ]
+        if len(uncached) < PARALLEL_COUNT_THRESHOLD:
+            return
+        
+        count = self.token_counter.count_message_tokens
+        size = -(-len(uncached) // PARALLEL_COUNT_WORKERS)
+        chunks = [uncached[i:i + size] for i in range(0, len(uncached), size)]
+        
+        # tiktoken encodes without the GIL, so the chunks really run concurrently.
+        # Only this thread writes the memo.
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            for chunk, counts in zip(chunks, pool.map(lambda c: list(map(count, c)), chunks)):
+                for msg, tokens in zip(chunk, counts):
+                    self._remember_tokens(msg, tokens)
+    
+    def compact(
         self,
         messages: List[Message],
         target_tokens: int,
@@ -106,23 +258,35 @@ class ConversationCompactor:
             raise ValueError(f"Unknown compaction strategy: {strategy.name}")
         
         compaction_func = self.strategies[strategy.name]
-        compacted_messages = await compaction_func(messages, target_tokens, strategy)
+        # Every strategy counts most messages, so warm the memo up front
+        self._prime_token_cache(messages)
+        compacted_messages = compaction_func(messages, target_tokens, strategy)
         
-        original_tokens = sum(
-            self.token_counter.count_message_tokens(msg) for msg in messages
-        )
-        compacted_tokens = sum(
-            self.token_counter.count_message_tokens(msg) for msg in compacted_messages
-        )
+        count = self.count_message_tokens
+        original_tokens = sum(map(count, messages))
+        compacted_tokens = sum(map(count, compacted_messages))
+        
+        # Dropped messages won't be counted again
+        self._token_cache = OrderedDict((id(msg), (msg, count(msg))) for msg in compacted_messages)
         
         return CompactionResult(
             original_messages=messages,
             compacted_messages=compacted_messages,
             tokens_saved=original_tokens - compacted_tokens,
-            strategy_used=strategy.name
+            strategy_used=strategy.name,
+            original_tokens=original_tokens
         )
     
-    async def _chronological_compaction(
+    def _newest_within_budget(self, messages: List[Message], budget: int) -> List[Message]:
+        """Get the longest run of newest messages whose tokens fit in budget."""
+        # Running totals from the newest message back; non-decreasing, so bisectable
+        suffix_sums = list(itertools.accumulate(
+            map(self.count_message_tokens, reversed(messages))
+        ))
+        count = bisect.bisect_right(suffix_sums, budget)
+        return messages[len(messages) - count:]
+    
+    def _chronological_compaction(
         self,
         messages: List[Message],
         target_tokens: int,
@@ -132,22 +296,24 @@ class ConversationCompactor:
         if len(messages) <= strategy.preserve_recent_messages:
             return messages
         
-        # Always preserve system messages if configured
-        system_messages = [
-            msg for msg in messages 
-            if msg.role == MessageRole.SYSTEM and strategy.preserve_system_messages
-        ]
+        # Recent messages are kept as they are, wherever system messages sit
+        recent_start = len(messages) - strategy.preserve_recent_messages
+        recent_messages = messages[recent_start:]
         
-        # Get recent messages to preserve
-        recent_messages = messages[-strategy.preserve_recent_messages:]
+        # One pass over the older messages: preserved system messages vs. candidates
+        system_messages = []
+        middle_messages = []
+        preserve_system = strategy.preserve_system_messages
+        for msg in itertools.islice(messages, recent_start):
+            if preserve_system and msg.role == MessageRole.SYSTEM:
+                system_messages.append(msg)
+            else:
+                middle_messages.append(msg)
         
         # Calculate remaining budget
-        system_tokens = sum(
-            self.token_counter.count_message_tokens(msg) for msg in system_messages
-        )
-        recent_tokens = sum(
-            self.token_counter.count_message_tokens(msg) for msg in recent_messages
-        )
+        count = self.count_message_tokens
+        system_tokens = sum(map(count, system_messages))
+        recent_tokens = sum(map(count, recent_messages))
         
         remaining_budget = target_tokens - system_tokens - recent_tokens
         
@@ -155,21 +321,11 @@ class ConversationCompactor:
             return system_messages + recent_messages
         
         # Fill remaining budget with middle messages
-        middle_messages = messages[len(system_messages):-strategy.preserve_recent_messages]
-        selected_middle = []
-        current_tokens = 0
-        
-        for msg in reversed(middle_messages):
-            msg_tokens = self.token_counter.count_message_tokens(msg)
-            if current_tokens + msg_tokens <= remaining_budget:
-                selected_middle.insert(0, msg)
-                current_tokens += msg_tokens
-            else:
-                break
+        selected_middle = self._newest_within_budget(middle_messages, remaining_budget)
         
         return system_messages + selected_middle + recent_messages
     
-    async def _semantic_compaction(
+    def _semantic_compaction(
         self,
         messages: List[Message],
         target_tokens: int,
@@ -178,9 +334,9 @@ class ConversationCompactor:
         """Compact based on semantic importance (simplified version)."""
         # For now, fall back to chronological compaction
         # TODO: Implement actual semantic analysis
-        return await self._chronological_compaction(messages, target_tokens, strategy)
+        return self._chronological_compaction(messages, target_tokens, strategy)
     
-    async def _tool_context_compaction(
+    def _tool_context_compaction(
         self,
         messages: List[Message],
         target_tokens: int,
@@ -190,42 +346,122 @@ class ConversationCompactor:
         important_messages = []
         regular_messages = []
         
+        # Loop-invariant: which roles are always kept
+        important_roles = {MessageRole.TOOL}
+        if strategy.preserve_system_messages:
+            important_roles.add(MessageRole.SYSTEM)
+        
         for msg in messages:
-            if (msg.role == MessageRole.TOOL or 
-                msg.tool_calls or 
-                (msg.role == MessageRole.SYSTEM and strategy.preserve_system_messages)):
+            if msg.role in important_roles or msg.tool_calls:
                 important_messages.append(msg)
             else:
                 regular_messages.append(msg)
         
         # Calculate tokens for important messages
-        important_tokens = sum(
-            self.token_counter.count_message_tokens(msg) for msg in important_messages
-        )
+        important_tokens = sum(map(self.count_message_tokens, important_messages))
         
         if important_tokens >= target_tokens:
             # If important messages exceed target, use chronological on them
-            return await self._chronological_compaction(
+            return self._chronological_compaction(
                 important_messages, target_tokens, strategy
             )
         
         # Fill remaining space with regular messages
         remaining_budget = target_tokens - important_tokens
-        selected_regular = []
-        current_tokens = 0
         
         # Prefer recent regular messages
-        for msg in reversed(regular_messages):
-            msg_tokens = self.token_counter.count_message_tokens(msg)
-            if current_tokens + msg_tokens <= remaining_budget:
-                selected_regular.insert(0, msg)
-                current_tokens += msg_tokens
+        selected_regular = self._newest_within_budget(regular_messages, remaining_budget)
+        
+        # Both lists are already chronological, so a linear merge keeps the order
+        return list(heapq.merge(
+            important_messages, selected_regular, key=operator.attrgetter("timestamp")
+        ))
+    
+    def _digest_compaction(
+        self,
+        messages: List[Message],
+        target_tokens: int,
+        strategy: CompactionStrategy
+    ) -> List[Message]:
+        """Keep the recent window verbatim and fold older messages into one digest."""
+        # A turn is a user message and its reply
+        if strategy.window is not None:
+            preserve_recent = strategy.window * 2
+        else:
+            preserve_recent = strategy.preserve_recent_messages
+        if len(messages) <= preserve_recent:
+            return messages
+        
+        recent_start = len(messages) - preserve_recent
+        recent_messages = messages[recent_start:]
+        
+        system_messages = []
+        older_messages = []
+        preserve_system = strategy.preserve_system_messages
+        for msg in itertools.islice(messages, recent_start):
+            # An earlier digest is folded into the new one rather than kept
+            if preserve_system and msg.role == MessageRole.SYSTEM and "digest_of" not in msg.metadata:
+                system_messages.append(msg)
             else:
-                break
+                older_messages.append(msg)
+        
+        if not older_messages:
+            return messages
+        
+        count = self.count_message_tokens
+        header = "Earlier conversation (condensed):"
+        remaining_budget = (
+            target_tokens
+            - sum(map(count, system_messages))
+            - sum(map(count, recent_messages))
+            - self.token_counter.count_tokens(header)
+        )
+        if remaining_budget <= 0:
+            return system_messages + recent_messages
+        
+        # One line per older message, newest lines kept first when over budget
+        lines = []
+        digested = 0
+        for msg in older_messages:
+            if "digest_of" in msg.metadata:
+                lines.extend(msg.content.split("\n")[1:])
+                digested += msg.metadata["digest_of"]
+                continue
+            digested += 1
+            first_line = msg.content.strip().split("\n", 1)[0]
+            if len(first_line) > DIGEST_LINE_CHARS:
+                first_line = first_line[:DIGEST_LINE_CHARS] + "..."
+            lines.append(f"{msg.role.value}: {first_line}")
+        
+        suffix_sums = list(itertools.accumulate(
+            map(self.token_counter.count_tokens, reversed(lines))
+        ))
+        kept = bisect.bisect_right(suffix_sums, remaining_budget)
+        if not kept:
+            return system_messages + recent_messages
         
-        # Merge and maintain chronological order
-        all_selected = important_messages + selected_regular
-        return sorted(all_selected, key=lambda msg: msg.timestamp)
+        digest = Message.create(
+            MessageRole.SYSTEM,
+            "\n".join([header, *lines[len(lines) - kept:]]),
+            metadata={"digest_of": digested}
+        )
+        return system_messages + [digest] + recent_messages
+
+
+class UtilizationInfo(NamedTuple):
+    """Context window utilization snapshot."""
+    current_tokens: int
+    max_tokens: int
+    utilization: float
+    needs_compaction: bool
+    threshold: float
+    available_tokens: int
+    message_count: int
+    
+    @property
+    def utilization_percent(self) -> str:
+        """Utilization formatted as a percentage, built only when displayed."""
+        return f"{self.utilization:.2%}"
 
 
 class ContextWindowManager:
@@ -236,16 +472,9 @@ class ContextWindowManager:
         token_counter: Optional[TokenCounter] = None,
         default_strategy: Optional[CompactionStrategy] = None
     ):
-        self.token_counter = token_counter or SimpleTokenCounter()
+        self.token_counter = token_counter or create_token_counter()
         self.compactor = ConversationCompactor(self.token_counter)
-        self.default_strategy = default_strategy or CompactionStrategy(
-            name="chronological",
-            priority=1,
-            preserve_recent_messages=5,
-            preserve_system_messages=True,
-            preserve_tool_results=True,
-            max_compaction_ratio=0.7
-        )
+        self.default_strategy = default_strategy or DEFAULT_STRATEGY
         self._compaction_callbacks: List[Callable[[CompactionResult], None]] = []
     
     def add_compaction_callback(self, callback: Callable[[CompactionResult], None]) -> None:
@@ -254,11 +483,11 @@ class ContextWindowManager:
     
     def calculate_message_tokens(self, message: Message) -> int:
         """Calculate tokens for a message."""
-        return self.token_counter.count_message_tokens(message)
+        return self.compactor.count_message_tokens(message)
     
     def calculate_conversation_tokens(self, messages: List[Message]) -> int:
         """Calculate total tokens for conversation."""
-        return sum(self.calculate_message_tokens(msg) for msg in messages)
+        return self.compactor.sum_message_tokens(messages)
     
     async def check_and_compact(
         self,
@@ -289,7 +518,8 @@ class ContextWindowManager:
         
         logger.debug(f"Compacting conversation: target={target_tokens}, strategy={strategy.name}")
         
-        compaction_result = await self.compactor.compact(
+        # Compaction is pure CPU work; only this public entry point stays async
+        compaction_result = self.compactor.compact(
             state.messages,
             target_tokens,
             strategy
@@ -307,24 +537,23 @@ class ContextWindowManager:
             f"({compaction_result.compaction_ratio:.2%} reduction)"
         )
         
-        new_token_count = self.calculate_conversation_tokens(compaction_result.compacted_messages)
-        return compaction_result.compacted_messages, new_token_count
+        # Already summed by the compactor; no need to recount the survivors
+        return compaction_result.compacted_messages, compaction_result.compacted_tokens
     
     def estimate_tokens_for_text(self, text: str) -> int:
         """Estimate tokens for arbitrary text."""
         return self.token_counter.count_tokens(text)
     
-    def get_utilization_info(self, state: ConversationState) -> Dict[str, Any]:
+    def get_utilization_info(self, state: ConversationState) -> UtilizationInfo:
         """Get detailed utilization information."""
         context_window = state.context_window
         
-        return {
-            'current_tokens': context_window.current_tokens,
-            'max_tokens': context_window.max_tokens,
-            'utilization': context_window.utilization,
-            'utilization_percent': f"{context_window.utilization:.2%}",
-            'needs_compaction': context_window.needs_compaction,
-            'threshold': context_window.compaction_threshold,
-            'available_tokens': context_window.max_tokens - context_window.current_tokens,
-            'message_count': len(state.messages)
-        }
\ No newline at end of file
+        return UtilizationInfo(
+            current_tokens=context_window.current_tokens,
+            max_tokens=context_window.max_tokens,
+            utilization=context_window.utilization,
+            needs_compaction=context_window.needs_compaction,
+            threshold=context_window.compaction_threshold,
+            available_tokens=context_window.max_tokens - context_window.current_tokens,
+            message_count=len(state.messages)
+        )
\ No newline at end of file
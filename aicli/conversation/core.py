@@ -3,12 +3,19 @@ Core conversation management integration.
 """
 import asyncio
 import logging
-from typing import Optional, Dict, Any, Callable, List
+from typing import Optional, Dict, Any, Callable, List, Set
+from dataclasses import replace
 from datetime import datetime
 
 from .state import ConversationState, Message, MessageRole, ConversationStatus
 from .manager import StateManager, StateManagerFactory, StateAction
-from .context_window import ContextWindowManager, CompactionStrategy, CompactionResult
+from .context_window import (
+    ContextWindowManager,
+    CompactionStrategy,
+    CompactionResult,
+    DEFAULT_STRATEGY,
+    UtilizationInfo
+)
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +45,18 @@ class ConversationManager:
         # Set up compaction callback
         self.context_window_manager.add_compaction_callback(self._on_compaction)
         
+        # Auto-compaction guards: no re-entry from our own COMPACT_CONVERSATION
+        # dispatch, and no re-check while the token count hasn't moved
+        self._compacting = False
+        self._last_checked_tokens: Optional[int] = None
+        
+        # Conversation subscribers, notified once per burst of changes with the
+        # latest state rather than once per change
+        self._change_subscribers: Dict[int, Callable[[ConversationState], Any]] = {}
+        self._next_subscriber_id = 0
+        self._notify_scheduled = False
+        self._notify_tasks: Set[asyncio.Task] = set()
+        
         # Subscribe to state changes for automatic compaction
         self._unsubscribe = self.state_manager.subscribe(self._on_state_change)
     
@@ -113,8 +132,9 @@ class ConversationManager:
     
     async def force_compaction(self, strategy: Optional[CompactionStrategy] = None) -> CompactionResult:
         """Force conversation compaction."""
+        original_state = self.current_state
         messages, token_count = await self.context_window_manager.compact_conversation(
-            self.current_state,
+            original_state,
             strategy
         )
         
@@ -128,26 +148,30 @@ class ConversationManager:
         
         await self.state_manager.dispatch(action)
         
-        # Return the compaction result
+        # Measured against the state before compaction was applied
+        original_tokens = original_state.context_window.current_tokens
         return CompactionResult(
-            original_messages=self.current_state.messages,
+            original_messages=original_state.messages,
             compacted_messages=messages,
-            tokens_saved=self.current_state.context_window.current_tokens - token_count,
-            strategy_used=strategy.name if strategy else "default"
+            tokens_saved=original_tokens - token_count,
+            strategy_used=strategy.name if strategy else "default",
+            original_tokens=original_tokens
         )
     
     def get_messages(self, role: Optional[MessageRole] = None) -> List[Message]:
         """Get messages, optionally filtered by role."""
-        messages = self.current_state.messages
+        state = self.current_state
         if role:
-            return [msg for msg in messages if msg.role == role]
-        return messages
+            # O(k) via the role index instead of scanning every message
+            messages = state.messages
+            return [messages[i] for i in state.messages_by_role.get(role, ())]
+        return state.messages
     
     def get_recent_messages(self, count: int) -> List[Message]:
         """Get the most recent messages."""
         return self.current_state.messages[-count:] if count > 0 else []
     
-    def get_utilization_info(self) -> Dict[str, Any]:
+    def get_utilization_info(self) -> UtilizationInfo:
         """Get context window utilization information."""
         return self.context_window_manager.get_utilization_info(self.current_state)
     
@@ -156,11 +180,60 @@ class ConversationManager:
         return self.context_window_manager.estimate_tokens_for_text(text)
     
     def subscribe_to_changes(self, callback: Callable[[ConversationState], None]) -> Callable[[], None]:
-        """Subscribe to conversation state changes."""
-        return self.state_manager.subscribe(callback)
+        """Subscribe to conversation state changes. Returns unsubscribe function.
+        
+        Changes made within one event-loop iteration are coalesced into a single
+        callback with the latest state. Sync callbacks run on the event loop and
+        should be quick; use flush_notifications() to deliver pending ones now.
+        """
+        token = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        self._change_subscribers[token] = callback
+        
+        def unsubscribe():
+            self._change_subscribers.pop(token, None)
+        
+        return unsubscribe
+    
+    def flush_notifications(self) -> None:
+        """Notify conversation subscribers of the latest state if a change is pending."""
+        if not self._notify_scheduled:
+            return
+        self._notify_scheduled = False
+        
+        state = self.current_state
+        # Snapshot, so subscribers may unsubscribe while being notified
+        for callback in list(self._change_subscribers.values()):
+            try:
+                result = callback(state)
+                if asyncio.iscoroutine(result):
+                    # Kept referenced until done so the task isn't collected early
+                    task = asyncio.ensure_future(result)
+                    self._notify_tasks.add(task)
+                    task.add_done_callback(self._on_notify_done)
+            except Exception as e:
+                logger.error(f"Error notifying subscriber: {e}")
+    
+    def _on_notify_done(self, task: "asyncio.Task") -> None:
+        """Log a failed async subscriber and release its task."""
+        self._notify_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error notifying subscriber: {task.exception()}")
     
     async def _on_state_change(self, state: ConversationState) -> None:
         """Handle state changes and trigger auto-compaction if needed."""
+        # One flush per loop iteration covers every change made before it runs
+        if self._change_subscribers and not self._notify_scheduled:
+            self._notify_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush_notifications)
+        
+        current_tokens = state.context_window.current_tokens
+        if self._compacting or current_tokens == self._last_checked_tokens:
+            # Status and metadata updates don't change whether compaction is needed
+            return
+        self._last_checked_tokens = current_tokens
+        
+        self._compacting = True
         try:
             compaction_result = await self.context_window_manager.check_and_compact(state)
             
@@ -174,9 +247,12 @@ class ConversationManager:
                     }
                 )
                 await self.state_manager.dispatch(action)
+                self._last_checked_tokens = token_count
         
         except Exception as e:
             logger.error(f"Error in auto-compaction: {e}")
+        finally:
+            self._compacting = False
     
     def _on_compaction(self, result: CompactionResult) -> None:
         """Handle compaction events."""
@@ -190,6 +266,8 @@ class ConversationManager:
         """Clean up resources."""
         if self._unsubscribe:
             self._unsubscribe()
+        self._change_subscribers.clear()
+        self._notify_scheduled = False
         self.state_manager.close()
 
 
@@ -205,17 +283,18 @@ class ConversationManagerFactory:
     def create_with_strategy(
         max_tokens: int = 4000,
         strategy_name: str = "chronological",
-        preserve_recent: int = 5
+        preserve_recent: int = 5,
+        window: Optional[int] = None
     ) -> ConversationManager:
         """Create conversation manager with custom compaction strategy."""
-        strategy = CompactionStrategy(
+        strategy = replace(
+            DEFAULT_STRATEGY,
             name=strategy_name,
-            priority=1,
             preserve_recent_messages=preserve_recent,
-            preserve_system_messages=True,
-            preserve_tool_results=True,
-            max_compaction_ratio=0.7
+            window=window
         )
+        if strategy == DEFAULT_STRATEGY:
+            strategy = DEFAULT_STRATEGY  # Share the module instance when nothing changed
         
         return ConversationManager(
             max_tokens=max_tokens,
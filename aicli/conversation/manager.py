@@ -2,11 +2,12 @@
 State management with dispatch/reducer pattern and middleware pipeline.
 """
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Callable, Dict, List, Optional, Protocol, Type, TypeVar, Union
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor
 import logging
+import sys
 
 from .state import ConversationState, Message, ConversationStatus, MessageRole, TokenUsage
 
@@ -26,6 +27,10 @@ class StateAction:
     """Standard action implementation."""
     type: str
     payload: Optional[Dict[str, Any]] = None
+    
+    def __post_init__(self):
+        # Interned so reducer lookups compare by identity on the fast path
+        self.type = sys.intern(self.type)
 
 
 class Middleware(ABC):
@@ -54,44 +59,62 @@ class Reducer(ABC):
 class ConversationReducer(Reducer):
     """Main conversation reducer."""
     
+    @staticmethod
+    def _add_message(state: ConversationState, payload: Dict[str, Any]) -> ConversationState:
+        message = payload.get("message")
+        token_count = payload.get("token_count", 0)
+        if message:
+            return state.add_message(message, token_count)
+        return state
+    
+    @staticmethod
+    def _update_status(state: ConversationState, payload: Dict[str, Any]) -> ConversationState:
+        status = payload.get("status")
+        if status:
+            return state.update_status(status)
+        return state
+    
+    @staticmethod
+    def _compact_conversation(state: ConversationState, payload: Dict[str, Any]) -> ConversationState:
+        new_messages = payload.get("messages", [])
+        new_token_count = payload.get("token_count", 0)
+        return state.compact(new_messages, new_token_count)
+    
+    @staticmethod
+    def _update_metadata(state: ConversationState, payload: Dict[str, Any]) -> ConversationState:
+        key = payload.get("key")
+        value = payload.get("value")
+        if key is not None:
+            return state.update_metadata(key, value)
+        return state
+    
+    @staticmethod
+    def _update_context_window(state: ConversationState, payload: Dict[str, Any]) -> ConversationState:
+        max_tokens = payload.get("max_tokens")
+        if max_tokens:
+            new_context_window = replace(
+                state.context_window,
+                max_tokens=max_tokens
+            )
+            return replace(state, context_window=new_context_window)
+        return state
+    
+    # One dict lookup per action instead of an if/elif scan. The underlying
+    # functions are stored since staticmethod objects aren't callable before 3.10.
+    _HANDLERS: Dict[str, Callable[[ConversationState, Dict[str, Any]], ConversationState]] = {
+        "ADD_MESSAGE": _add_message.__func__,
+        "UPDATE_STATUS": _update_status.__func__,
+        "COMPACT_CONVERSATION": _compact_conversation.__func__,
+        "UPDATE_METADATA": _update_metadata.__func__,
+        "UPDATE_CONTEXT_WINDOW": _update_context_window.__func__,
+    }
+    
     def __call__(self, state: ConversationState, action: Action) -> ConversationState:
         """Reduce conversation state based on action type."""
-        action_type = action.type
-        payload = action.payload or {}
-        
-        if action_type == "ADD_MESSAGE":
-            message = payload.get("message")
-            token_count = payload.get("token_count", 0)
-            if message:
-                return state.add_message(message, token_count)
-        
-        elif action_type == "UPDATE_STATUS":
-            status = payload.get("status")
-            if status:
-                return state.update_status(status)
-        
-        elif action_type == "COMPACT_CONVERSATION":
-            new_messages = payload.get("messages", [])
-            new_token_count = payload.get("token_count", 0)
-            return state.compact(new_messages, new_token_count)
-        
-        elif action_type == "UPDATE_METADATA":
-            key = payload.get("key")
-            value = payload.get("value")
-            if key is not None:
-                return state.update_metadata(key, value)
-        
-        elif action_type == "UPDATE_CONTEXT_WINDOW":
-            max_tokens = payload.get("max_tokens")
-            if max_tokens:
-                from dataclasses import replace
-                new_context_window = replace(
-                    state.context_window,
-                    max_tokens=max_tokens
-                )
-                return replace(state, context_window=new_context_window)
-        
-        return state
+        handler = self._HANDLERS.get(action.type)
+        if handler is None:
+            return state
+        return handler(state, action.payload or {})
 
 
 class LoggingMiddleware(Middleware):
@@ -104,6 +127,10 @@ class LoggingMiddleware(Middleware):
         next_middleware: Callable[[Action], ConversationState]
     ) -> ConversationState:
         """Log action and state changes."""
+        # Checked once so the messages aren't formatted when DEBUG is off
+        if not logger.isEnabledFor(logging.DEBUG):
+            return await next_middleware(action)
+        
         logger.debug(f"Action dispatched: {action.type}")
         logger.debug(f"Current state: messages={len(state.messages)}, tokens={state.context_window.current_tokens}")
         
@@ -165,13 +192,21 @@ class StateManager:
         self,
         initial_state: ConversationState,
         reducer: Reducer,
-        middleware: Optional[List[Middleware]] = None
+        middleware: Optional[List[Middleware]] = None,
+        executor: Optional[Executor] = None
     ):
         self._state = initial_state
         self._reducer = reducer
         self._middleware = middleware or []
-        self._subscribers: List[Callable[[ConversationState], None]] = []
-        self._executor = ThreadPoolExecutor(max_workers=2)
+        # Middleware is fixed after construction, so the chain is built once
+        self._chain = self._build_middleware_chain()
+        # Keyed by subscription token so unsubscribing is O(1), and split by
+        # kind at subscribe time so notifying needs no introspection
+        self._async_subscribers: Dict[int, Callable[[ConversationState], Any]] = {}
+        self._sync_subscribers: Dict[int, Callable[[ConversationState], None]] = {}
+        self._next_subscriber_id = 0
+        # Runs sync subscribers; None shares the event loop's default executor
+        self._executor = executor
     
     @property
     def state(self) -> ConversationState:
@@ -180,11 +215,16 @@ class StateManager:
     
     def subscribe(self, callback: Callable[[ConversationState], None]) -> Callable[[], None]:
         """Subscribe to state changes. Returns unsubscribe function."""
-        self._subscribers.append(callback)
+        token = self._next_subscriber_id
+        self._next_subscriber_id += 1
+        if asyncio.iscoroutinefunction(callback):
+            subscribers = self._async_subscribers
+        else:
+            subscribers = self._sync_subscribers
+        subscribers[token] = callback
         
         def unsubscribe():
-            if callback in self._subscribers:
-                self._subscribers.remove(callback)
+            subscribers.pop(token, None)
         
         return unsubscribe
     
@@ -193,7 +233,9 @@ class StateManager:
         try:
             new_state = await self._apply_middleware(action, self._state)
             
-            if new_state != self._state:
+            # Mutators always return a fresh state, so identity means no-op
+            # and the deep dataclass comparison can be skipped
+            if new_state is not self._state:
                 old_state = self._state
                 self._state = new_state
                 await self._notify_subscribers(old_state, new_state)
@@ -209,30 +251,28 @@ class StateManager:
         if not self._middleware:
             return self._reducer(state, action)
         
-        middleware_chain = self._build_middleware_chain()
-        return await middleware_chain(action)
+        return await self._chain(action)
     
-    def _build_middleware_chain(self) -> Callable[[Action], ConversationState]:
+    def _build_middleware_chain(self) -> Callable[[Action], Any]:
         """Build middleware chain with reducer at the end."""
         def final_reducer(action: Action) -> ConversationState:
             return self._reducer(self._state, action)
         
-        chain = final_reducer
+        def create_middleware_wrapper(mw, prev_chain):
+            # Decided once here rather than on every call through the chain
+            if asyncio.iscoroutinefunction(prev_chain):
+                next_fn = prev_chain
+            else:
+                async def next_fn(action: Action) -> ConversationState:
+                    return prev_chain(action)
+            
+            async def wrapper(action: Action) -> ConversationState:
+                return await mw(action, self._state, next_fn)
+            return wrapper
         
+        chain = final_reducer
         for middleware in reversed(self._middleware):
-            previous_chain = chain
-            
-            async def create_middleware_wrapper(mw, prev_chain):
-                async def wrapper(action: Action) -> ConversationState:
-                    async def next_fn(action: Action) -> ConversationState:
-                        if asyncio.iscoroutinefunction(prev_chain):
-                            return await prev_chain(action)
-                        else:
-                            return prev_chain(action)
-                    return await mw(action, self._state, next_fn)
-                return wrapper
-            
-            chain = await create_middleware_wrapper(middleware, previous_chain)
+            chain = create_middleware_wrapper(middleware, chain)
         
         return chain
     
@@ -242,18 +282,22 @@ class StateManager:
         new_state: ConversationState
     ) -> None:
         """Notify all subscribers of state change."""
-        for subscriber in self._subscribers:
-            try:
-                if asyncio.iscoroutinefunction(subscriber):
-                    await subscriber(new_state)
-                else:
-                    await asyncio.get_event_loop().run_in_executor(
-                        self._executor,
-                        subscriber,
-                        new_state
-                    )
-            except Exception as e:
-                logger.error(f"Error notifying subscriber: {e}")
+        # Snapshots, so subscribers may unsubscribe while being notified. All
+        # subscribers run concurrently: one slow subscriber doesn't delay the rest.
+        notifications = [
+            subscriber(new_state) for subscriber in list(self._async_subscribers.values())
+        ]
+        if self._sync_subscribers:
+            loop = asyncio.get_running_loop()
+            notifications.extend(
+                loop.run_in_executor(self._executor, subscriber, new_state)
+                for subscriber in list(self._sync_subscribers.values())
+            )
+        
+        results = await asyncio.gather(*notifications, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error notifying subscriber: {result}")
     
     def reset(self, new_state: ConversationState) -> None:
         """Reset state to a new state."""
@@ -261,7 +305,9 @@ class StateManager:
     
     def close(self) -> None:
         """Clean up resources."""
-        self._executor.shutdown(wait=True)
+        # The executor belongs to the loop or the caller, so only drop subscribers
+        self._sync_subscribers.clear()
+        self._async_subscribers.clear()
 
 
 class StateManagerFactory:
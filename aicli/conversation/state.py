@@ -1,12 +1,21 @@
 """
 Immutable conversation state management following React patterns.
 """
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union, overload
 from enum import Enum
+import itertools
+import sys
+import time
 import uuid
 
+# dataclass(slots=True) needs Python 3.10; older interpreters keep __dict__
+_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+T = TypeVar("T")
+S = TypeVar("S", bound="_SharedList[Any]")
+
 
 class MessageRole(Enum):
     USER = "user"
@@ -22,7 +31,7 @@ class ConversationStatus(Enum):
     ERROR = "error"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class Message:
     """Immutable message structure."""
     id: str
@@ -51,7 +60,86 @@ class Message:
         )
 
 
-@dataclass(frozen=True)
+class _SharedList(Sequence[T]):
+    """Immutable sequence with O(1) append for linear histories.
+    
+    Each instance is a view of the first ``length`` items of a backing list
+    that may be shared with other states. Appending to the newest view
+    extends the shared list in place; appending to an older view (a diverging
+    branch of history) copies its prefix first, so no view ever changes.
+    Appends to the same view must not race; StateManager reduces on a single
+    event loop, so they don't.
+    """
+    
+    __slots__ = ("_items", "_length")
+    
+    def __init__(self, items: Iterable[T] = (), *, _items: Optional[List[T]] = None, _length: int = 0):
+        if _items is None:
+            _items = list(items)
+            _length = len(_items)
+        self._items = _items
+        self._length = _length
+    
+    def append(self: S, item: T) -> S:
+        """Return a new list with item added at the end."""
+        items = self._items
+        if len(items) != self._length:
+            # Someone already extended the shared list past this view
+            items = items[:self._length]
+        items.append(item)
+        return type(self)(_items=items, _length=self._length + 1)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __iter__(self) -> Iterator[T]:
+        return itertools.islice(self._items, self._length)
+    
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> List[T]: ...
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Bound the slice by this view's length without copying the prefix
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                return self._items[start:max(start, stop)]
+            return [self._items[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self._items[index]
+    
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _SharedList) and other._items is self._items:
+            return other._length == self._length
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(other) == self._length and all(a == b for a, b in zip(self, other))
+    
+    __hash__ = None  # type: ignore[assignment]
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class MessageList(_SharedList[Message]):
+    """Immutable message sequence with O(1) append; see _SharedList."""
+    
+    __slots__ = ()
+
+
+class RolePositions(_SharedList[int]):
+    """Positions of one role's messages, appended alongside MessageList."""
+    
+    __slots__ = ()
+
+
+@dataclass(frozen=True, **_SLOTS)
 class TokenUsage:
     """Token usage tracking."""
     prompt_tokens: int = 0
@@ -67,35 +155,56 @@ class TokenUsage:
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class ContextWindow:
     """Context window state."""
     max_tokens: int
     current_tokens: int
     compaction_threshold: float = 0.85
+    # Derived in __post_init__; declared as fields so slotted instances have room
+    _utilization: float = field(init=False, repr=False, compare=False)
+    _needs_compaction: bool = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Frozen, so the derived values are computed once per instance
+        utilization = self.current_tokens / self.max_tokens if self.max_tokens > 0 else 0.0
+        object.__setattr__(self, "_utilization", utilization)
+        object.__setattr__(self, "_needs_compaction", utilization >= self.compaction_threshold)
     
     @property
     def utilization(self) -> float:
         """Get current utilization percentage."""
-        return self.current_tokens / self.max_tokens if self.max_tokens > 0 else 0.0
+        return self._utilization
     
     @property
     def needs_compaction(self) -> bool:
         """Check if compaction is needed."""
-        return self.utilization >= self.compaction_threshold
+        return self._needs_compaction
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class ConversationState:
     """Immutable conversation state following React patterns."""
     id: str
-    messages: List[Message]
+    messages: MessageList
     status: ConversationStatus
     context_window: ContextWindow
     token_usage: TokenUsage
     metadata: Dict[str, Any]
     created_at: datetime
-    updated_at: datetime
+    # Nanoseconds since the epoch; time.time_ns() is far cheaper than
+    # datetime.now() on every mutation. See the updated_at property.
+    updated_at_ns: int
+    # Positions in messages per role, kept in step by add_message and compact
+    messages_by_role: Dict[MessageRole, RolePositions] = field(default_factory=dict)
+    
+    @staticmethod
+    def _index_by_role(messages: Sequence[Message]) -> Dict[MessageRole, RolePositions]:
+        """Build the role index for a message list."""
+        index: Dict[MessageRole, List[int]] = {}
+        for i, message in enumerate(messages):
+            index.setdefault(message.role, []).append(i)
+        return {role: RolePositions(positions) for role, positions in index.items()}
     
     @classmethod
     def create(
@@ -104,60 +213,97 @@ class ConversationState:
         metadata: Optional[Dict[str, Any]] = None
     ) -> "ConversationState":
         """Create a new conversation state."""
-        now = datetime.now()
+        now_ns = time.time_ns()
         return cls(
             id=str(uuid.uuid4()),
-            messages=[],
+            messages=MessageList(),
             status=ConversationStatus.ACTIVE,
             context_window=ContextWindow(max_tokens=max_tokens, current_tokens=0),
             token_usage=TokenUsage(),
             metadata=metadata or {},
-            created_at=now,
-            updated_at=now
+            created_at=datetime.fromtimestamp(now_ns / 1e9),
+            updated_at_ns=now_ns
         )
     
+    @property
+    def updated_at(self) -> datetime:
+        """Get the time of the last update."""
+        return datetime.fromtimestamp(self.updated_at_ns / 1e9)
+    
     def add_message(self, message: Message, token_count: int = 0) -> "ConversationState":
         """Add a message and update token count."""
-        new_messages = self.messages + [message]
+        new_messages = self.messages.append(message)
+        new_messages_by_role = {
+            **self.messages_by_role,
+            # O(1): the positions share their backing list like the messages do
+            message.role: self.messages_by_role.get(message.role, RolePositions()).append(len(self.messages))
+        }
         new_token_usage = self.token_usage.add(TokenUsage(total_tokens=token_count))
-        new_context_window = replace(
-            self.context_window,
-            current_tokens=self.context_window.current_tokens + token_count
+        context_window = self.context_window
+        new_context_window = ContextWindow(
+            max_tokens=context_window.max_tokens,
+            current_tokens=context_window.current_tokens + token_count,
+            compaction_threshold=context_window.compaction_threshold
         )
         
-        return replace(
-            self,
+        # Direct construction; dataclasses.replace walks fields() on every call
+        return ConversationState(
+            id=self.id,
             messages=new_messages,
-            token_usage=new_token_usage,
+            status=self.status,
             context_window=new_context_window,
-            updated_at=datetime.now()
+            token_usage=new_token_usage,
+            metadata=self.metadata,
+            created_at=self.created_at,
+            updated_at_ns=time.time_ns(),
+            messages_by_role=new_messages_by_role
         )
     
     def update_status(self, status: ConversationStatus) -> "ConversationState":
         """Update conversation status."""
-        return replace(
-            self,
+        return ConversationState(
+            id=self.id,
+            messages=self.messages,
             status=status,
-            updated_at=datetime.now()
+            context_window=self.context_window,
+            token_usage=self.token_usage,
+            metadata=self.metadata,
+            created_at=self.created_at,
+            updated_at_ns=time.time_ns(),
+            messages_by_role=self.messages_by_role
         )
     
-    def compact(self, new_messages: List[Message], new_token_count: int) -> "ConversationState":
+    def compact(self, new_messages: Sequence[Message], new_token_count: int) -> "ConversationState":
         """Apply compaction with new message list and token count."""
-        return replace(
-            self,
+        new_messages = MessageList(new_messages)
+        context_window = self.context_window
+        return ConversationState(
+            id=self.id,
             messages=new_messages,
-            context_window=replace(
-                self.context_window,
-                current_tokens=new_token_count
+            status=self.status,
+            context_window=ContextWindow(
+                max_tokens=context_window.max_tokens,
+                current_tokens=new_token_count,
+                compaction_threshold=context_window.compaction_threshold
             ),
-            updated_at=datetime.now()
+            token_usage=self.token_usage,
+            metadata=self.metadata,
+            created_at=self.created_at,
+            updated_at_ns=time.time_ns(),
+            messages_by_role=self._index_by_role(new_messages)
         )
     
     def update_metadata(self, key: str, value: Any) -> "ConversationState":
         """Update metadata with a new key-value pair."""
         new_metadata = {**self.metadata, key: value}
-        return replace(
-            self,
+        return ConversationState(
+            id=self.id,
+            messages=self.messages,
+            status=self.status,
+            context_window=self.context_window,
+            token_usage=self.token_usage,
             metadata=new_metadata,
-            updated_at=datetime.now()
+            created_at=self.created_at,
+            updated_at_ns=time.time_ns(),
+            messages_by_role=self.messages_by_role
         )
\ No newline at end of file
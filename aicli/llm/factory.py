@@ -1,21 +1,99 @@
 """LLM factory for creating different language model instances."""
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_community.llms import Ollama
+import functools
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, FrozenSet, Mapping, Tuple, Type
 from langchain_core.language_models import BaseLanguageModel
 
 from ..utils.config import LLMConfig
 
+if TYPE_CHECKING:
+    from langchain_anthropic import ChatAnthropic
+    from langchain_community.llms import Ollama
+    from langchain_openai import ChatOpenAI
+
+
+# Provider SDKs are heavy and only one is used per session, so they are
+# imported on first use rather than at startup
+@functools.lru_cache(maxsize=None)
+def _openai_cls() -> Type["ChatOpenAI"]:
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI
+
+
+@functools.lru_cache(maxsize=None)
+def _anthropic_cls() -> Type["ChatAnthropic"]:
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic
+
+
+@functools.lru_cache(maxsize=None)
+def _ollama_cls() -> Type["Ollama"]:
+    from langchain_community.llms import Ollama
+    return Ollama
+
+
+# Shared read-only provider catalogue, built once at import
+_AVAILABLE_PROVIDERS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "openai": MappingProxyType({
+        "name": "OpenAI",
+        "models": ("gpt-4", "gpt-4-turbo-preview", "gpt-3.5-turbo"),
+        "requires_api_key": True,
+        "default_model": "gpt-4",
+    }),
+    "anthropic": MappingProxyType({
+        "name": "Anthropic",
+        "models": ("claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307"),
+        "requires_api_key": True,
+        "default_model": "claude-3-sonnet-20240229",
+    }),
+    "ollama": MappingProxyType({
+        "name": "Ollama (Local)",
+        "models": ("llama2", "codellama", "mistral", "neural-chat"),
+        "requires_api_key": False,
+        "default_model": "llama2",
+    }),
+    "fireworks": MappingProxyType({
+        "name": "Fireworks AI",
+        "models": ("accounts/fireworks/models/llama-v2-70b-chat",),
+        "requires_api_key": True,
+        "default_model": "accounts/fireworks/models/llama-v2-70b-chat",
+    }),
+    "together": MappingProxyType({
+        "name": "Together AI",
+        "models": ("meta-llama/Llama-2-70b-chat-hf", "mistralai/Mixtral-8x7B-Instruct-v0.1"),
+        "requires_api_key": True,
+        "default_model": "meta-llama/Llama-2-70b-chat-hf",
+    }),
+})
+
 
 class LLMFactory:
     """Factory for creating LLM instances."""
     
     @staticmethod
     def create_llm(config: LLMConfig) -> BaseLanguageModel:
-        """Create an LLM instance based on configuration."""
-        provider = config.provider.lower()
+        """Create an LLM instance based on configuration.
+        
+        Instances are cached per distinct configuration, so agents rebuilt
+        with the same settings share one client and its open connections.
+        """
+        return LLMFactory._build_llm(LLMFactory._config_key(config))
+    
+    @staticmethod
+    def _config_key(config: LLMConfig) -> FrozenSet[Tuple[str, Any]]:
+        """Reduce the config to a hashable key; LLMConfig itself is mutable."""
+        # Built from every field, so new LLMConfig settings are keyed automatically
+        fields = config.model_dump()
+        fields["provider"] = config.provider.lower()
+        return frozenset(fields.items())
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _build_llm(key: FrozenSet[Tuple[str, Any]]) -> BaseLanguageModel:
+        """Instantiate the LLM for a config key."""
+        config = LLMConfig(**dict(key))
+        provider = config.provider
         
         if provider == "openai":
             return LLMFactory._create_openai(config)
@@ -31,13 +109,17 @@ class LLMFactory:
             raise ValueError(f"Unsupported LLM provider: {provider}")
     
     @staticmethod
-    def _create_openai(config: LLMConfig) -> ChatOpenAI:
+    def _create_openai(config: LLMConfig) -> "ChatOpenAI":
         """Create OpenAI LLM instance."""
         kwargs = {
             "model": config.model,
             "temperature": config.temperature,
             "max_tokens": config.max_tokens,
             "timeout": config.timeout,
+            "streaming": config.streaming,
+            # Streamed replies carry token usage only when asked to, and ChatOpenAI
+            # only asks by default for api.openai.com, not a custom base_url
+            "stream_usage": True,
         }
         
         if config.api_key:
@@ -45,16 +127,17 @@ class LLMFactory:
         if config.base_url:
             kwargs["base_url"] = config.base_url
             
-        return ChatOpenAI(**kwargs)
+        return _openai_cls()(**kwargs)
     
     @staticmethod
-    def _create_anthropic(config: LLMConfig) -> ChatAnthropic:
+    def _create_anthropic(config: LLMConfig) -> "ChatAnthropic":
         """Create Anthropic LLM instance."""
         kwargs = {
             "model": config.model,
             "temperature": config.temperature,
             "max_tokens": config.max_tokens,
             "timeout": config.timeout,
+            "streaming": config.streaming,
         }
         
         if config.api_key:
@@ -62,10 +145,10 @@ class LLMFactory:
         if config.base_url:
             kwargs["base_url"] = config.base_url
             
-        return ChatAnthropic(**kwargs)
+        return _anthropic_cls()(**kwargs)
     
     @staticmethod
-    def _create_ollama(config: LLMConfig) -> Ollama:
+    def _create_ollama(config: LLMConfig) -> "Ollama":
         """Create Ollama LLM instance."""
         kwargs = {
             "model": config.model,
@@ -77,10 +160,10 @@ class LLMFactory:
         else:
             kwargs["base_url"] = "http://localhost:11434"
             
-        return Ollama(**kwargs)
+        return _ollama_cls()(**kwargs)
     
     @staticmethod
-    def _create_fireworks(config: LLMConfig) -> ChatOpenAI:
+    def _create_fireworks(config: LLMConfig) -> "ChatOpenAI":
         """Create Fireworks LLM instance using OpenAI-compatible API."""
         kwargs = {
             "model": config.model,
@@ -88,15 +171,18 @@ class LLMFactory:
             "max_tokens": config.max_tokens,
             "base_url": config.base_url or "https://api.fireworks.ai/inference/v1",
             "timeout": config.timeout,
+            "streaming": config.streaming,
+            # As for OpenAI with a base_url; see _create_openai
+            "stream_usage": True,
         }
         
         if config.api_key:
             kwargs["api_key"] = config.api_key
             
-        return ChatOpenAI(**kwargs)
+        return _openai_cls()(**kwargs)
     
     @staticmethod
-    def _create_together(config: LLMConfig) -> ChatOpenAI:
+    def _create_together(config: LLMConfig) -> "ChatOpenAI":
         """Create Together AI LLM instance using OpenAI-compatible API."""
         kwargs = {
             "model": config.model,
@@ -104,45 +190,17 @@ class LLMFactory:
             "max_tokens": config.max_tokens,
             "base_url": config.base_url or "https://api.together.xyz/v1",
             "timeout": config.timeout,
+            "streaming": config.streaming,
+            # As for OpenAI with a base_url; see _create_openai
+            "stream_usage": True,
         }
         
         if config.api_key:
             kwargs["api_key"] = config.api_key
             
-        return ChatOpenAI(**kwargs)
+        return _openai_cls()(**kwargs)
     
     @staticmethod
-    def get_available_providers() -> Dict[str, Dict[str, Any]]:
+    def get_available_providers() -> Mapping[str, Mapping[str, Any]]:
         """Get information about available LLM providers."""
-        return {
-            "openai": {
-                "name": "OpenAI",
-                "models": ["gpt-4", "gpt-4-turbo-preview", "gpt-3.5-turbo"],
-                "requires_api_key": True,
-                "default_model": "gpt-4",
-            },
-            "anthropic": {
-                "name": "Anthropic",
-                "models": ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307"],
-                "requires_api_key": True,
-                "default_model": "claude-3-sonnet-20240229",
-            },
-            "ollama": {
-                "name": "Ollama (Local)",
-                "models": ["llama2", "codellama", "mistral", "neural-chat"],
-                "requires_api_key": False,
-                "default_model": "llama2",
-            },
-            "fireworks": {
-                "name": "Fireworks AI",
-                "models": ["accounts/fireworks/models/llama-v2-70b-chat"],
-                "requires_api_key": True,
-                "default_model": "accounts/fireworks/models/llama-v2-70b-chat",
-            },
-            "together": {
-                "name": "Together AI",
-                "models": ["meta-llama/Llama-2-70b-chat-hf", "mistralai/Mixtral-8x7B-Instruct-v0.1"],
-                "requires_api_key": True,
-                "default_model": "meta-llama/Llama-2-70b-chat-hf",
-            },
-        }
\ No newline at end of file
+        return _AVAILABLE_PROVIDERS
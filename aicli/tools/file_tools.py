@@ -1,11 +1,37 @@
 """File operation tools for the AI agent."""
 
 import os
+import re
+import shutil
+import stat
+import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from langchain_core.tools import BaseTool
 from pydantic import Field
 import fnmatch
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads used to scan files during content search
+SEARCH_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Results shown per search; walking stops once one more than this is found
+MAX_SEARCH_RESULTS = 20
+
+# Directories never descended into by searches (hidden ones are skipped too)
+IGNORED_DIRS = frozenset({'__pycache__', 'node_modules'})
+
+# Leading bytes checked for NUL to tell binary files from text, as grep does
+BINARY_SNIFF_BYTES = 8192
+
+# Larger files are skipped by content search; they're rarely source code
+MAX_SEARCH_FILE_BYTES = 8 * 1024 * 1024
+
+
+def _unique_sibling(path: Path, suffix: str) -> Path:
+    """Get a hidden, practically unique name next to path for staging files."""
+    return path.parent / f".{path.name}.{uuid.uuid4().hex}{suffix}"
 
 
 class FileReadTool(BaseTool):
@@ -52,21 +78,23 @@ class FileSearchTool(BaseTool):
         """Search for files and content."""
         try:
             results = []
+            # One extra result tells us whether more matches exist
+            limit = MAX_SEARCH_RESULTS + 1
             
             # If query looks like a file pattern, search by filename
             if any(char in query for char in ['*', '?', '.']):
-                results = self._search_by_pattern(query)
+                results = self._search_by_pattern(query, limit)
             else:
                 # Search by content
-                results = self._search_by_content(query)
+                results = self._search_by_content(query, limit)
             
             if not results:
                 return "No files found matching the search criteria."
             
             # Format results
-            if len(results) > 20:
-                results = results[:20]
-                truncated_msg = f"\\n(Showing first 20 of {len(results)} results)"
+            if len(results) > MAX_SEARCH_RESULTS:
+                results = results[:MAX_SEARCH_RESULTS]
+                truncated_msg = f"\\n(Showing first {MAX_SEARCH_RESULTS} results; more files matched)"
             else:
                 truncated_msg = ""
             
@@ -80,71 +108,112 @@ class FileSearchTool(BaseTool):
         except Exception as e:
             return f"Error searching: {str(e)}"
     
-    def _search_by_pattern(self, pattern: str) -> List[Dict[str, str]]:
-        """Search files by filename pattern."""
+    def _search_by_pattern(self, pattern: str, max_results: Optional[int] = None) -> List[Dict[str, str]]:
+        """Search files by filename pattern, stopping after max_results matches."""
+        matches = (
+            {"file": entry.path}
+            for entry in self._walk_files(".")
+            if fnmatch.fnmatch(entry.name, pattern)
+        )
+        return list(itertools.islice(matches, max_results))
+    
+    def _search_by_content(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, str]]:
+        """Search files by content, stopping after max_results matching files."""
         results = []
+        # Compiled once and matched in C. ASCII queries match raw bytes, so files
+        # are never decoded except for the matching line; bytes patterns fold
+        # ASCII case only, so other queries match decoded text instead.
+        if query.isascii():
+            pattern = re.compile(re.escape(query.encode('ascii')), re.IGNORECASE)
+        else:
+            pattern = re.compile(re.escape(query), re.IGNORECASE)
+        
+        # Walked lazily so an early stop skips the rest; binaries are
+        # recognised by content in _search_file
+        file_paths = (entry.path for entry in self._walk_files("."))
         
-        for root, dirs, files in os.walk("."):
-            # Skip common directories to ignore
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules']]
-            
-            for file in files:
-                if fnmatch.fnmatch(file, pattern):
-                    file_path = os.path.join(root, file)
-                    results.append({"file": file_path})
+        def scan(file_path: str) -> Optional[Dict[str, Any]]:
+            try:
+                return self._search_file(file_path, pattern)
+            except Exception:
+                return None  # Skip files that can't be read
+        
+        # Scanning is I/O-bound, so threads overlap the open/read syscalls;
+        # map() keeps results in walk order. Files are submitted in batches so
+        # reaching max_results leaves the rest of the tree unread.
+        with ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS) as executor:
+            while True:
+                batch = list(itertools.islice(file_paths, SEARCH_MAX_WORKERS * 4))
+                if not batch:
+                    break
+                for file_path, match in zip(batch, executor.map(scan, batch)):
+                    if match:
+                        results.append({"file": file_path, **match})
+                        if max_results is not None and len(results) >= max_results:
+                            return results
         
         return results
     
-    def _search_by_content(self, query: str) -> List[Dict[str, str]]:
-        """Search files by content."""
-        results = []
-        query_lower = query.lower()
+    def _search_file(self, file_path: str, pattern: "re.Pattern[Any]") -> Optional[Dict[str, Any]]:
+        """Return the line and context of the first match in a file, if any."""
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_SEARCH_FILE_BYTES:
+                return None
+            # Read rather than mapped: a mapping faults with SIGBUS if the file
+            # is truncated while it is being searched
+            data = f.read()
         
-        for root, dirs, files in os.walk("."):
-            # Skip common directories to ignore
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules']]
-            
-            for file in files:
-                # Only search in text files
-                if not self._is_text_file(file):
-                    continue
-                
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                    
-                    for i, line in enumerate(lines):
-                        if query_lower in line.lower():
-                            context = line.strip()
-                            if len(context) > 100:
-                                context = context[:100] + "..."
-                            
-                            results.append({
-                                "file": file_path,
-                                "line": i + 1,
-                                "context": context
-                            })
-                            break  # Only show first match per file
-                            
-                except Exception:
-                    continue  # Skip files that can't be read
+        if self._is_binary(data):
+            return None
         
-        return results
+        newline = b'\n'
+        if isinstance(pattern.pattern, str):
+            data = data.decode('utf-8', errors='ignore')
+            newline = '\n'
+        
+        match = pattern.search(data)
+        if match is None:
+            return None
+        
+        start = match.start()
+        line_start = data.rfind(newline, 0, start) + 1
+        line_end = data.find(newline, start)
+        if line_end == -1:
+            line_end = len(data)
+        line_number = data.count(newline, 0, line_start) + 1
+        line = data[line_start:line_end]
+        
+        context = (line if isinstance(line, str) else line.decode('utf-8', errors='ignore')).strip()
+        if len(context) > 100:
+            context = context[:100] + "..."
+        
+        return {"line": line_number, "context": context}
     
-    def _is_text_file(self, filename: str) -> bool:
-        """Check if file is likely a text file."""
-        text_extensions = {
-            '.py', '.js', '.ts', '.tsx', '.jsx', '.html', '.css', '.scss',
-            '.json', '.xml', '.yaml', '.yml', '.md', '.txt', '.rst',
-            '.sql', '.sh', '.bash', '.zsh', '.fish', '.ps1', '.bat',
-            '.c', '.cpp', '.cc', '.h', '.hpp', '.java', '.kt', '.scala',
-            '.go', '.rs', '.rb', '.php', '.pl', '.r', '.swift', '.dart',
-            '.vim', '.lua', '.tcl', '.awk', '.sed', '.grep', '.diff',
-            '.patch', '.log', '.cfg', '.conf', '.ini', '.env'
-        }
+    def _walk_files(self, directory: str) -> Iterator[os.DirEntry]:
+        """Yield regular files under directory in os.walk order, skipping ignored directories."""
+        # scandir's DirEntry carries the type from the directory listing, so
+        # classifying entries needs no extra stat calls
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Like os.walk, symlinked directories aren't followed
+                        if not (entry.name.startswith('.') or entry.name in IGNORED_DIRS or entry.is_symlink()):
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        # Regular files only: opening a FIFO or device blocks
+                        yield entry
+        except OSError:
+            return  # Unreadable directories are skipped, as os.walk does
         
-        return Path(filename).suffix.lower() in text_extensions
+        for subdir in subdirs:
+            yield from self._walk_files(subdir)
+    
+    def _is_binary(self, data: bytes) -> bool:
+        """Check if file content is likely binary (a NUL byte near the start)."""
+        return data.find(b'\x00', 0, BINARY_SNIFF_BYTES) != -1
 
 
 class FileWriteTool(BaseTool):
@@ -171,19 +240,55 @@ class FileWriteTool(BaseTool):
             if path.is_absolute() and not str(path).startswith(os.getcwd()):
                 return "Cannot write files outside the current project directory"
             
-            # Create backup if file exists
-            if path.exists():
-                backup_path = path.with_suffix(path.suffix + '.backup')
-                path.rename(backup_path)
-            
             # Create directory if it doesn't exist
             path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write file
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Write beside the target and swap it in with one atomic rename, so
+            # readers never see a missing or half-written file. The temporary
+            # name is unique, so concurrent writes to one path can't collide.
+            tmp_path = _unique_sibling(path, '.tmp')
+            # O_EXCL never reuses a file; mode 0o666 lets the umask apply as open() would
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            try:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    try:
+                        # An existing file keeps its mode across the swap
+                        os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+                    except FileNotFoundError:
+                        pass  # New file
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                self._backup(path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             
             return f"Successfully wrote to {file_path}"
             
         except Exception as e:
-            return f"Error writing file: {str(e)}"
\ No newline at end of file
+            return f"Error writing file: {str(e)}"
+    
+    def _backup(self, path: Path) -> None:
+        """Keep the current contents of path, if any, at path.backup.
+        
+        The copy is staged under a unique name and renamed into place, so
+        concurrent writers each swap in a complete backup.
+        """
+        backup_path = path.with_suffix(path.suffix + '.backup')
+        staged_path = _unique_sibling(path, '.backup.tmp')
+        try:
+            try:
+                # A hard link shares the old inode, which os.replace leaves untouched
+                os.link(path, staged_path)
+            except FileNotFoundError:
+                return  # Nothing to back up
+            except OSError:
+                shutil.copy2(path, staged_path)
+            os.replace(staged_path, backup_path)
+        except FileNotFoundError:
+            pass  # path vanished while being copied
+        finally:
+            staged_path.unlink(missing_ok=True)
\ No newline at end of file
@@ -1,9 +1,228 @@
 """Git operation tools for the AI agent."""
 
+import logging
+import os
 import subprocess
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from langchain_core.tools import BaseTool
-from pathlib import Path
+from pydantic import PrivateAttr
+
+from .process import run_captured
+
+logger = logging.getLogger(__name__)
+
+
+class GitObjectReader:
+    """Reads git objects through one long-running `git cat-file --batch` process.
+    
+    Each lookup is a line written to the process and a framed reply read
+    back, instead of a fork+exec of git per query.
+    """
+    
+    def __init__(self, cwd: str = ".", check_only: bool = False):
+        self.cwd = cwd
+        # --batch-check answers with the header only, for existence/type queries
+        self.check_only = check_only
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_proc(self) -> subprocess.Popen:
+        """Start the cat-file process if it isn't running."""
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch-check" if self.check_only else "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.cwd,
+                bufsize=0
+            )
+        return self._proc
+    
+    def read(self, spec: str) -> Optional[Tuple[str, bytes]]:
+        """Return (type, content) for an object spec such as "HEAD:path", or None if missing.
+        
+        Content is empty for check-only readers.
+        """
+        if "\n" in spec:
+            raise ValueError("Object spec must be a single line")
+        
+        with self._lock:
+            proc = self._ensure_proc()
+            try:
+                proc.stdin.write(spec.encode() + b"\n")
+                # Reply framing per git-cat-file(1): "<sha> <type> <size>\n<content>\n",
+                # or "<spec> missing\n" / "<spec> ambiguous\n"
+                header = proc.stdout.readline()
+                if not header:
+                    raise OSError("git cat-file exited")
+                fields = header.split()
+                if len(fields) != 3:
+                    return None
+                content = b""
+                if not self.check_only:
+                    content = self._read_exactly(proc, int(fields[2]))
+                    self._read_exactly(proc, 1)  # Trailing newline
+            except (OSError, ValueError):
+                # The stream is out of sync or gone; start over on the next read
+                self._kill()
+                raise
+        
+        return fields[1].decode(), content
+    
+    @staticmethod
+    def _read_exactly(proc: subprocess.Popen, size: int) -> bytes:
+        """Read exactly size bytes from the process output."""
+        chunks = []
+        while size:
+            chunk = proc.stdout.read(size)
+            if not chunk:
+                raise OSError("git cat-file exited")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+    
+    def _kill(self) -> None:
+        """Stop the process without waiting for pending replies."""
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+    
+    def close(self) -> None:
+        """Stop the cat-file process."""
+        with self._lock:
+            if self._proc is not None:
+                self._proc.stdin.close()  # cat-file exits at end of input
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+                    self._proc.wait()
+                self._proc.stdout.close()
+                self._proc = None
+
+
+class GitResultCache:
+    """LRU cache of successful read-only git command results.
+    
+    Entries are keyed on the command, the working directory (pathspecs and
+    --show-prefix are relative to it) and the modification times and sizes
+    of the files git rewrites when HEAD, a ref or the index moves, so a commit,
+    checkout or fetch invalidates them. Every loose ref under refs/ is part of
+    the key, since refs such as refs/remotes/origin/main live in
+    subdirectories whose parents' mtimes don't change. The TTL bounds
+    staleness from changes those files don't reflect.
+    """
+    
+    # Relative to the git directory
+    STATE_PATHS = ("HEAD", "index", "packed-refs", "logs/HEAD", "FETCH_HEAD")
+    REFS_DIR = "refs"
+    
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, subprocess.CompletedProcess]]" = OrderedDict()
+        self._git_dirs: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+    
+    def _git_dir(self) -> Optional[str]:
+        """Resolve the git directory for the working directory, once per directory."""
+        cwd = os.getcwd()
+        if cwd not in self._git_dirs:
+            result = run_captured(["git", "rev-parse", "--absolute-git-dir"], timeout=5)
+            self._git_dirs[cwd] = result.stdout.strip() if result.returncode == 0 else None
+        return self._git_dirs[cwd]
+    
+    def _repo_signature(self) -> Optional[Tuple[Any, ...]]:
+        """Return the repository state part of the cache key, or None outside a repo."""
+        git_dir = self._git_dir()
+        if git_dir is None:
+            return None
+        
+        signature: List[Any] = [git_dir, os.getcwd()]
+        for name in self.STATE_PATHS:
+            try:
+                # Size too, since appends within one mtime tick still grow logs/HEAD
+                stat = os.stat(os.path.join(git_dir, name))
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        
+        refs_dir = os.path.join(git_dir, self.REFS_DIR)
+        for root, dirs, files in os.walk(refs_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed while walking
+                signature.append((os.path.relpath(path, refs_dir), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
+    def run(self, command: Sequence[str], timeout: float) -> subprocess.CompletedProcess:
+        """Run a read-only git command, reusing the last result while the repo is unchanged."""
+        signature = self._repo_signature()
+        if signature is None:
+            return run_captured(command, timeout=timeout)
+        
+        key = (tuple(command), signature)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        result = run_captured(command, timeout=timeout)
+        if result.returncode == 0:
+            # Failures aren't cached; they're often transient
+            with self._lock:
+                self._entries[key] = (now, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+    
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by the git tools; results only depend on the repository
+_git_cache = GitResultCache()
+
+# Read-only and basic write operations GitTool allows. Anything else is
+# refused, including push, pull, fetch, merge, rebase, reset, rm, clean, gc,
+# prune, reflog, fsck, remote, config, init and clone.
+SAFE_GIT_COMMANDS = frozenset({
+    'status', 'diff', 'log', 'show', 'blame', 'branch',
+    'ls-files', 'ls-tree', 'cat-file', 'rev-parse',
+    'add', 'commit', 'checkout', 'switch', 'restore'
+})
+
+# Run in the background when GitAnalysisTool is built, so the first
+# recent_changes query is served from the cache
+RECENT_CHANGES_COMMAND = ("git", "diff", "--name-status", "HEAD~10..HEAD")
+
+
+def _prewarm_recent_changes() -> None:
+    """Fill the git cache with the recent changes of the current repository."""
+    try:
+        _git_cache.run(RECENT_CHANGES_COMMAND, timeout=10)
+    except Exception as e:
+        logger.debug(f"Could not pre-warm recent changes: {e}")
+
+
+# GitTool commands whose output depends only on commits and refs, not on the
+# working tree, so they are safe to serve from the cache
+CACHEABLE_GIT_COMMANDS = frozenset({'log', 'show', 'ls-tree', 'cat-file', 'rev-parse'})
 
 
 class GitTool(BaseTool):
@@ -23,6 +242,8 @@ class GitTool(BaseTool):
     Example: "status", "diff", "log --oneline -10"
     """
     
+    _reader: GitObjectReader = PrivateAttr(default_factory=GitObjectReader)
+    
     def _run(self, command: str) -> str:
         """Execute git command."""
         try:
@@ -38,22 +259,27 @@ class GitTool(BaseTool):
             if not self._is_safe_command(git_cmd):
                 return f"Git command '{git_cmd}' is not allowed for safety reasons"
             
-            # Build full git command
-            full_command = ["git", git_cmd] + args
+            # "show <rev>:<path>" of a blob is served by the persistent reader
+            output = self._show_blob(args[0]) if git_cmd == "show" and len(args) == 1 else None
             
-            # Execute command
-            result = subprocess.run(
-                full_command,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd="."
-            )
-            
-            if result.returncode != 0:
-                return f"Git command failed:\\nError: {result.stderr}"
+            if output is None:
+                # Build full git command
+                full_command = ["git", git_cmd] + args
+                
+                # Execute command
+                if git_cmd in CACHEABLE_GIT_COMMANDS:
+                    result = _git_cache.run(full_command, timeout=30)
+                else:
+                    result = run_captured(full_command, timeout=30, cwd=".")
+                
+                if result.returncode != 0:
+                    return f"Git command failed:\\nError: {result.stderr}"
+                
+                output = result.stdout
             
-            output = result.stdout.strip()
+            # Only trailing whitespace is dropped: git never leads with blank
+            # lines, and the leading space of "status --short" rows is meaningful
+            output = output.rstrip()
             if not output:
                 output = "Command completed successfully (no output)"
             
@@ -64,23 +290,33 @@ class GitTool(BaseTool):
         except Exception as e:
             return f"Error executing git command: {str(e)}"
     
+    def _show_blob(self, spec: str) -> Optional[str]:
+        """Return the content of a blob spec via cat-file, or None to fall back to git show."""
+        if ":" not in spec or spec.startswith("-"):
+            return None
+        try:
+            obj = self._reader.read(spec)
+        except (OSError, ValueError) as e:
+            logger.debug(f"git cat-file unavailable, falling back to git show: {e}")
+            return None
+        if obj is None or obj[0] != "blob":
+            # Missing objects and trees keep git show's own messages and formatting
+            return None
+        return obj[1].decode("utf-8", errors="replace")
+    
+    def close(self) -> None:
+        """Stop the persistent git process."""
+        self._reader.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _is_safe_command(self, command: str) -> bool:
         """Check if git command is safe to execute."""
-        # Allow read-only and basic write operations
-        safe_commands = {
-            'status', 'diff', 'log', 'show', 'blame', 'branch',
-            'ls-files', 'ls-tree', 'cat-file', 'rev-parse',
-            'add', 'commit', 'checkout', 'switch', 'restore'
-        }
-        
-        # Dangerous commands to avoid
-        dangerous_commands = {
-            'push', 'pull', 'fetch', 'merge', 'rebase', 'reset',
-            'rm', 'clean', 'gc', 'prune', 'reflog', 'fsck',
-            'remote', 'config', 'init', 'clone'
-        }
-        
-        return command in safe_commands and command not in dangerous_commands
+        return command in SAFE_GIT_COMMANDS
 
 
 class GitAnalysisTool(BaseTool):
@@ -95,6 +331,13 @@ class GitAnalysisTool(BaseTool):
     - stats: Show repository statistics
     """
     
+    _checker: GitObjectReader = PrivateAttr(default_factory=lambda: GitObjectReader(check_only=True))
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Start pre-warming the recent-changes query."""
+        super().model_post_init(__context)
+        threading.Thread(target=_prewarm_recent_changes, daemon=True).start()
+    
     def _run(self, analysis_type: str) -> str:
         """Perform git analysis."""
         try:
@@ -122,10 +365,7 @@ class GitAnalysisTool(BaseTool):
     def _get_recent_changes(self) -> str:
         """Get recently changed files."""
         try:
-            result = subprocess.run(
-                ["git", "diff", "--name-status", "HEAD~10..HEAD"],
-                capture_output=True, text=True, timeout=10
-            )
+            result = _git_cache.run(RECENT_CHANGES_COMMAND, timeout=10)
             
             if result.returncode != 0:
                 return "Could not get recent changes"
@@ -141,13 +381,12 @@ class GitAnalysisTool(BaseTool):
     def _get_file_history(self, filepath: str) -> str:
         """Get history of a specific file."""
         try:
-            if not Path(filepath).exists():
-                return f"File not found: {filepath}"
+            # Asks git rather than the working tree: a file deleted on disk
+            # still has history, an untracked one has none
+            if not self._is_tracked(filepath):
+                return f"File not found in repository: {filepath}"
             
-            result = subprocess.run(
-                ["git", "log", "--oneline", "-10", "--", filepath],
-                capture_output=True, text=True, timeout=10
-            )
+            result = _git_cache.run(["git", "log", "--oneline", "-10", "--", filepath], timeout=10)
             
             if result.returncode != 0:
                 return f"Could not get history for {filepath}"
@@ -160,13 +399,30 @@ class GitAnalysisTool(BaseTool):
         except Exception as e:
             return f"Error getting file history: {str(e)}"
     
+    def _is_tracked(self, filepath: str) -> bool:
+        """Check whether filepath exists at HEAD, via the persistent cat-file check process."""
+        if os.path.isabs(filepath):
+            filepath = os.path.relpath(filepath)
+        try:
+            # "./" makes the path relative to the working directory, not the repo root
+            return self._checker.read(f"HEAD:./{filepath}") is not None
+        except (OSError, ValueError):
+            return True  # Not a repository (or no git); let git log report it
+    
+    def close(self) -> None:
+        """Stop the persistent git process."""
+        self._checker.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _get_contributors(self) -> str:
         """Get repository contributors."""
         try:
-            result = subprocess.run(
-                ["git", "shortlog", "-sn", "--all"],
-                capture_output=True, text=True, timeout=10
-            )
+            result = _git_cache.run(["git", "shortlog", "-sn", "--all"], timeout=10)
             
             if result.returncode != 0:
                 return "Could not get contributors"
@@ -182,33 +438,36 @@ class GitAnalysisTool(BaseTool):
             # Get basic stats
             stats = []
             
-            # Total commits
-            result = subprocess.run(
-                ["git", "rev-list", "--all", "--count"],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0:
-                stats.append(f"Total commits: {result.stdout.strip()}")
+            # The three queries are independent, so they run side by side and
+            # cost the slowest one instead of the sum
+            commands = [
+                ["git", "rev-list", "--all", "--count"],  # Total commits
+                ["git", "branch", "-a"],  # Branches
+                ["git", "ls-files"],  # File count
+            ]
+            with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+                commits, branches, files = executor.map(
+                    lambda command: _git_cache.run(command, timeout=5),
+                    commands
+                )
             
-            # Branches
-            result = subprocess.run(
-                ["git", "branch", "-a"],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0:
-                branch_count = len([l for l in result.stdout.split('\\n') if l.strip()])
-                stats.append(f"Total branches: {branch_count}")
-            
-            # File count
-            result = subprocess.run(
-                ["git", "ls-files"],
-                capture_output=True, text=True, timeout=5
-            )
-            if result.returncode == 0:
-                file_count = len([l for l in result.stdout.split('\\n') if l.strip()])
-                stats.append(f"Tracked files: {file_count}")
+            if commits.returncode == 0:
+                stats.append(f"Total commits: {commits.stdout.strip()}")
+            
+            if branches.returncode == 0:
+                stats.append(f"Total branches: {self._count_lines(branches.stdout)}")
+            
+            if files.returncode == 0:
+                stats.append(f"Tracked files: {self._count_lines(files.stdout)}")
             
             return "Repository statistics:\\n" + "\\n".join(stats)
             
         except Exception as e:
-            return f"Error getting repository stats: {str(e)}"
\ No newline at end of file
+            return f"Error getting repository stats: {str(e)}"
+    
+    @staticmethod
+    def _count_lines(output: str) -> int:
+        """Count output lines without splitting; git emits no blank lines here."""
+        if not output:
+            return 0
+        return output.count("\n") + (not output.endswith("\n"))
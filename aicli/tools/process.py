@@ -0,0 +1,22 @@
+"""Subprocess helpers shared by the tools."""
+
+import subprocess
+from typing import Optional, Sequence
+
+
+def run_captured(
+    command: Sequence[str],
+    timeout: float,
+    cwd: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """Run a command and capture its output as text.
+
+    Output is captured as bytes and decoded once as UTF-8 with replacement,
+    rather than through text=True: that skips the locale codec and newline
+    translation, and stray non-UTF-8 bytes (binary diffs, odd filenames)
+    can't raise UnicodeDecodeError.
+    """
+    result = subprocess.run(list(command), capture_output=True, timeout=timeout, cwd=cwd)
+    result.stdout = result.stdout.decode("utf-8", "replace") if result.stdout else ""
+    result.stderr = result.stderr.decode("utf-8", "replace") if result.stderr else ""
+    return result
@@ -0,0 +1,29 @@
+"""Python execution tools for the AI agent."""
+
+from typing import Optional
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+
+class LazyPythonREPLTool(BaseTool):
+    """Python REPL tool that imports and builds the real REPL on first use."""
+    
+    name: str = "Python_REPL"
+    description: str = (
+        "A Python shell. Use this to execute python commands. "
+        "Input should be a valid python command. "
+        "If you want to see the output of a value, you should print it out with `print(...)`."
+    )
+    
+    _impl: Optional[BaseTool] = PrivateAttr(default=None)
+    
+    def _get_impl(self) -> BaseTool:
+        """Build the underlying PythonREPLTool, importing langchain_experimental lazily."""
+        if self._impl is None:
+            from langchain_experimental.tools import PythonREPLTool
+            self._impl = PythonREPLTool()
+        return self._impl
+    
+    def _run(self, query: str) -> str:
+        """Execute Python code in the underlying REPL."""
+        return self._get_impl().run(query)
@@ -1,21 +1,79 @@
 """Tool registry for managing LangChain tools."""
 
-from typing import List, Dict, Any
+import functools
+from types import MappingProxyType
+from typing import List, Any, FrozenSet, Mapping, Tuple
 from langchain_core.tools import Tool
-from langchain_experimental.tools import PythonREPLTool
 
 from ..utils.config import Config
 from .file_tools import FileReadTool, FileSearchTool
 from .git_tools import GitTool
+from .python_tools import LazyPythonREPLTool
 from .shell_tools import SafeShellTool
 
+# Static descriptions of every tool the registry can provide
+_TOOL_INFO: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "file_read": MappingProxyType({
+        "name": "File Reader",
+        "description": "Read and analyze project files",
+        "category": "file_operations",
+        "always_enabled": True,
+    }),
+    "file_search": MappingProxyType({
+        "name": "File Search",
+        "description": "Search for files and content in the project",
+        "category": "file_operations", 
+        "always_enabled": True,
+    }),
+    "git": MappingProxyType({
+        "name": "Git Operations",
+        "description": "Perform git operations like status, diff, log",
+        "category": "version_control",
+        "always_enabled": True,
+    }),
+    "python_repl": MappingProxyType({
+        "name": "Python REPL",
+        "description": "Execute Python code safely",
+        "category": "code_execution",
+        "always_enabled": True,
+    }),
+    "shell": MappingProxyType({
+        "name": "Shell Commands",
+        "description": "Execute safe shell commands",
+        "category": "system",
+        "always_enabled": False,
+        "requires_config": "security.enable_shell_tools",
+    }),
+})
+
 
 class ToolRegistry:
     """Registry for managing and providing tools to the AI agent."""
     
     @staticmethod
     def get_tools(config: Config) -> List[Tool]:
-        """Get all available tools based on configuration."""
+        """Get all available tools based on configuration.
+        
+        Tools are built once per distinct tool configuration and shared by
+        every agent, so rebuilding an agent (e.g. on /model) reuses them.
+        """
+        return list(ToolRegistry._build_tools(ToolRegistry._config_key(config)))
+    
+    @staticmethod
+    def _config_key(config: Config) -> FrozenSet[Tuple[str, Any]]:
+        """Reduce the config to the hashable fields that affect tool construction."""
+        security = config.security
+        return frozenset({
+            ("enable_shell_tools", security.enable_shell_tools),
+            ("shell_whitelist", tuple(security.shell_whitelist)),
+            ("confirm_destructive", security.confirm_destructive),
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _build_tools(key: FrozenSet[Tuple[str, Any]]) -> Tuple[Tool, ...]:
+        """Instantiate the tools for a config key."""
+        options = dict(key)
         tools = []
         
         # Always include basic file tools
@@ -27,51 +85,19 @@ class ToolRegistry:
         # Add Git tools
         tools.append(GitTool())
         
-        # Add Python REPL tool
-        tools.append(PythonREPLTool())
+        # Add Python REPL tool; langchain_experimental is only imported on first use
+        tools.append(LazyPythonREPLTool())
         
         # Add shell tools if enabled
-        if config.security.enable_shell_tools:
+        if options["enable_shell_tools"]:
             tools.append(SafeShellTool(
-                whitelist=config.security.shell_whitelist,
-                require_confirmation=config.security.confirm_destructive
+                whitelist=list(options["shell_whitelist"]),
+                require_confirmation=options["confirm_destructive"]
             ))
         
-        return tools
+        return tuple(tools)
     
     @staticmethod
-    def get_tool_info() -> Dict[str, Dict[str, Any]]:
+    def get_tool_info() -> Mapping[str, Mapping[str, Any]]:
         """Get information about available tools."""
-        return {
-            "file_read": {
-                "name": "File Reader",
-                "description": "Read and analyze project files",
-                "category": "file_operations",
-                "always_enabled": True,
-            },
-            "file_search": {
-                "name": "File Search",
-                "description": "Search for files and content in the project",
-                "category": "file_operations", 
-                "always_enabled": True,
-            },
-            "git": {
-                "name": "Git Operations",
-                "description": "Perform git operations like status, diff, log",
-                "category": "version_control",
-                "always_enabled": True,
-            },
-            "python_repl": {
-                "name": "Python REPL",
-                "description": "Execute Python code safely",
-                "category": "code_execution",
-                "always_enabled": True,
-            },
-            "shell": {
-                "name": "Shell Commands",
-                "description": "Execute safe shell commands",
-                "category": "system",
-                "always_enabled": False,
-                "requires_config": "security.enable_shell_tools",
-            },
-        }
\ No newline at end of file
+        return _TOOL_INFO
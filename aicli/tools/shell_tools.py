@@ -1,11 +1,98 @@
 """Safe shell execution tools for the AI agent."""
 
+import functools
+import os
+import re
+import signal
 import subprocess
 import shlex
-from typing import List, Set, Optional
+import threading
+import time
+from typing import FrozenSet, List, Optional, Tuple
 from langchain_core.tools import BaseTool
 from pathlib import Path
 
+from .process import run_captured
+
+# Always allowed, on top of the configured whitelist
+BASE_SAFE_COMMANDS = frozenset({'ls', 'cat', 'grep', 'find', 'head', 'tail', 'wc'})
+
+DANGEROUS_PATTERNS = (
+    'rm -rf', 'rm -f', 'del ', 'format ', 'fdisk',
+    'mkfs', 'dd if=', 'dd of=', '> /dev/', 'chmod 777',
+    'chmod +x', 'sudo ', 'su ', 'passwd', 'useradd',
+    'userdel', 'kill -9', 'killall', 'pkill',
+    'wget ', 'curl ', 'ssh ', 'scp ', 'rsync ',
+    'mount ', 'umount ', 'systemctl', 'service ',
+    'iptables', 'firewall', 'netsh', 'ifconfig',
+    'route ', 'ping -f', 'nmap ', 'nc ', 'netcat'
+)
+
+# One alternation scans the command once instead of once per pattern
+_DANGEROUS_RE = re.compile("|".join(map(re.escape, DANGEROUS_PATTERNS)), re.IGNORECASE)
+
+# Seconds to wait for output after a test run exits; background children
+# that inherited the pipes would otherwise keep the readers going forever
+READER_DRAIN_TIMEOUT = 5.0
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_command(command: str) -> Tuple[Tuple[str, ...], str]:
+    """Split a command line once; agent loops often repeat the same command.
+    
+    Returns the arguments and the lowercased program name ("" if empty).
+    """
+    parts = tuple(shlex.split(command.strip()))
+    return parts, parts[0].lower() if parts else ""
+
+
+class _BoundedReader(threading.Thread):
+    """Drains a pipe on a thread, keeping only the first limit characters."""
+    
+    def __init__(self, stream, limit: int):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.limit = limit
+        self.chunks: List[str] = []
+        self.kept = 0
+        self.truncated = False
+        self.start()
+    
+    def run(self):
+        """Read the stream to the end."""
+        # Keeps reading past the limit so the child never blocks on a full pipe
+        for chunk in iter(lambda: self.stream.read(8192), ""):
+            room = self.limit - self.kept
+            if room > 0:
+                self.chunks.append(chunk[:room])
+                self.kept += min(room, len(chunk))
+            if len(chunk) > room:
+                self.truncated = True
+        self.stream.close()
+    
+    @property
+    def text(self) -> str:
+        """Get the kept output."""
+        return "".join(self.chunks)
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """Kill a process started with start_new_session, and its children."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass  # Already gone
+
+
+def _join_readers(readers: Tuple[_BoundedReader, ...], deadline: float) -> bool:
+    """Wait for readers until the monotonic deadline. Returns True if all finished."""
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+    return not any(reader.is_alive() for reader in readers)
+
 
 class SafeShellTool(BaseTool):
     """Safe shell command execution tool."""
@@ -21,24 +108,24 @@ class SafeShellTool(BaseTool):
     - "pip list" - show installed packages
     """
     
+    whitelist: FrozenSet[str] = BASE_SAFE_COMMANDS
+    require_confirmation: bool = True
+    
     def __init__(self, whitelist: List[str], require_confirmation: bool = True):
-        super().__init__()
-        self.whitelist: Set[str] = set(whitelist)
-        self.require_confirmation = require_confirmation
-        
-        # Add some basic safe commands
-        self.whitelist.update(['ls', 'cat', 'grep', 'find', 'head', 'tail', 'wc'])
+        # Frozen once so membership checks stay O(1) and the tool can be shared
+        super().__init__(
+            whitelist=frozenset(whitelist) | BASE_SAFE_COMMANDS,
+            require_confirmation=require_confirmation
+        )
     
     def _run(self, command: str) -> str:
         """Execute shell command safely."""
         try:
             # Parse command
-            parts = shlex.split(command.strip())
+            parts, base_command = _parse_command(command)
             if not parts:
                 return "No command provided"
             
-            base_command = parts[0].lower()
-            
             # Check if command is whitelisted
             if not self._is_command_allowed(base_command):
                 return f"Command '{base_command}' is not in the whitelist of allowed commands.\\nAllowed: {', '.join(sorted(self.whitelist))}"
@@ -48,31 +135,27 @@ class SafeShellTool(BaseTool):
                 return f"Command appears to be dangerous and is blocked: {command}"
             
             # Execute command
-            result = subprocess.run(
-                parts,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=".",
-                shell=False  # Never use shell=True for security
-            )
+            # Never use shell=True for security
+            result = run_captured(parts, timeout=30, cwd=".")
             
-            # Format output
+            # Format output; pieces are joined once at the end, so long output
+            # is copied into the reply once rather than once per concatenation
             output_parts = []
             
             if result.stdout:
-                output_parts.append(f"Output:\\n{result.stdout}")
+                output_parts += ("Output:\\n", result.stdout, "\\n\\n")
                 
             if result.stderr:
-                output_parts.append(f"Errors:\\n{result.stderr}")
+                output_parts += ("Errors:\\n", result.stderr, "\\n\\n")
             
             if result.returncode != 0:
-                output_parts.append(f"Exit code: {result.returncode}")
+                output_parts += (f"Exit code: {result.returncode}", "\\n\\n")
             
             if not output_parts:
-                output_parts.append("Command completed successfully (no output)")
+                return "Command completed successfully (no output)"
             
-            return "\\n\\n".join(output_parts)
+            output_parts.pop()  # Trailing separator
+            return "".join(output_parts)
             
         except subprocess.TimeoutExpired:
             return "Command timed out after 30 seconds"
@@ -87,19 +170,7 @@ class SafeShellTool(BaseTool):
     
     def _is_dangerous_command(self, command: str) -> bool:
         """Check for potentially dangerous command patterns."""
-        dangerous_patterns = [
-            'rm -rf', 'rm -f', 'del ', 'format ', 'fdisk',
-            'mkfs', 'dd if=', 'dd of=', '> /dev/', 'chmod 777',
-            'chmod +x', 'sudo ', 'su ', 'passwd', 'useradd',
-            'userdel', 'kill -9', 'killall', 'pkill',
-            'wget ', 'curl ', 'ssh ', 'scp ', 'rsync ',
-            'mount ', 'umount ', 'systemctl', 'service ',
-            'iptables', 'firewall', 'netsh', 'ifconfig',
-            'route ', 'ping -f', 'nmap ', 'nc ', 'netcat'
-        ]
-        
-        command_lower = command.lower()
-        return any(pattern in command_lower for pattern in dangerous_patterns)
+        return _DANGEROUS_RE.search(command) is not None
 
 
 class TestRunnerTool(BaseTool):
@@ -119,47 +190,62 @@ class TestRunnerTool(BaseTool):
     def _run(self, test_command: str) -> str:
         """Run tests."""
         try:
-            parts = shlex.split(test_command.strip())
+            parts, framework = _parse_command(test_command)
             if not parts:
                 return "No test command provided"
             
-            framework = parts[0].lower()
-            
             # Validate test framework
             allowed_frameworks = {'pytest', 'python', 'npm', 'jest', 'unittest'}
             if framework not in allowed_frameworks:
                 return f"Test framework '{framework}' not supported. Allowed: {', '.join(allowed_frameworks)}"
             
-            # Execute test command
-            result = subprocess.run(
-                parts,
-                capture_output=True,
-                text=True,
-                timeout=120,  # Longer timeout for tests
-                cwd="."
+            # Execute test command; output is streamed and truncated as it
+            # arrives, so verbose runs never sit in memory in full
+            process = subprocess.Popen(
+                list(parts),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding="utf-8",
+                errors="replace",
+                cwd=".",
+                # Own process group, so children can be killed with the run
+                start_new_session=True
             )
+            stdout_reader = _BoundedReader(process.stdout, 5000)
+            stderr_reader = _BoundedReader(process.stderr, 2000)
+            readers = (stdout_reader, stderr_reader)
+            try:
+                returncode = process.wait(timeout=120)  # Longer timeout for tests
+            except subprocess.TimeoutExpired:
+                _kill_process_group(process)
+                process.wait()
+                raise
+            finally:
+                if not _join_readers(readers, time.monotonic() + READER_DRAIN_TIMEOUT):
+                    # Leftover children still hold the pipes open
+                    _kill_process_group(process)
+                    _join_readers(readers, time.monotonic() + 1)
             
             # Format output
             output_parts = []
             
-            if result.stdout:
-                # Truncate very long output
-                stdout = result.stdout
-                if len(stdout) > 5000:
-                    stdout = stdout[:5000] + "\\n... (output truncated)"
+            if stdout_reader.text:
+                stdout = stdout_reader.text
+                if stdout_reader.truncated:
+                    stdout += "\\n... (output truncated)"
                 output_parts.append(f"Test Output:\\n{stdout}")
             
-            if result.stderr:
-                stderr = result.stderr
-                if len(stderr) > 2000:
-                    stderr = stderr[:2000] + "\\n... (errors truncated)"
+            if stderr_reader.text:
+                stderr = stderr_reader.text
+                if stderr_reader.truncated:
+                    stderr += "\\n... (errors truncated)"
                 output_parts.append(f"Test Errors:\\n{stderr}")
             
             # Add summary
-            if result.returncode == 0:
+            if returncode == 0:
                 output_parts.append("✅ Tests passed!")
             else:
-                output_parts.append(f"❌ Tests failed (exit code: {result.returncode})")
+                output_parts.append(f"❌ Tests failed (exit code: {returncode})")
             
             return "\\n\\n".join(output_parts)
             
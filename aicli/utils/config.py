@@ -1,14 +1,129 @@
 """Configuration management for AICLI."""
 
+import functools
+import hashlib
+import json
 import os
+import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, FrozenSet, Tuple
 from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
-import yaml
-from rich.table import Table
-from rich.console import Console
+
+# yaml and rich are imported where they are used, so commands that never
+# read a config file or print the config table don't pay for them at startup
+if TYPE_CHECKING:
+    from rich.table import Table
+
+# Config files looked for in the working directory, in priority order
+CWD_CONFIG_FILES = (".claudecli.yaml", ".claudecli.yml", "aicli.yaml", "aicli.yml")
+
+# Parsed config files are kept here as JSON, which reloads faster than YAML
+CONFIG_CACHE_DIR = Path("~/.cache/aicli/config")
+
+# Environment variables holding each provider's API key and model override
+PROVIDER_KEY_ENVS = MappingProxyType({
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "fireworks": "FIREWORKS_API_KEY",
+    "together": "TOGETHER_API_KEY",
+})
+PROVIDER_MODEL_ENVS = MappingProxyType({
+    "openai": "OPENAI_MODEL",
+    "anthropic": "ANTHROPIC_MODEL",
+    "fireworks": "FIREWORKS_MODEL",
+    "together": "TOGETHER_MODEL",
+    "ollama": "OLLAMA_MODEL",
+})
+
+# Directory -> (mtime_ns, listed at, entry names) as of the last listing
+_dir_listings: Dict[str, Tuple[int, float, FrozenSet[str]]] = {}
+
+# Seconds a listing is trusted while the directory's mtime is unchanged
+DIR_LISTING_TTL = 5.0
+
+# Config.load results by everything that feeds them; callers get copies
+_load_cache: Dict[Tuple[Any, ...], "Config"] = {}
+LOAD_CACHE_SIZE = 8
+
+@functools.lru_cache(maxsize=None)
+def _yaml_codecs() -> Tuple[Any, Any]:
+    """Get the YAML (Loader, Dumper), libyaml's C ones when PyYAML was built with it."""
+    try:
+        from yaml import CSafeDumper as Dumper, CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeDumper as Dumper, SafeLoader as Loader
+    return Loader, Dumper
+
+
+def _dir_names(directory: str) -> FrozenSet[str]:
+    """Get a directory's entry names, relisting after its mtime changes or the TTL."""
+    # Adding, removing or renaming an entry bumps the directory's mtime, so one
+    # stat usually tells whether the cached listing is still accurate. An entry
+    # made within the same mtime tick as the listing leaves the mtime as it
+    # was, so listings also expire after DIR_LISTING_TTL.
+    now = time.monotonic()
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = _dir_listings.get(directory)
+        if cached is not None and cached[0] == mtime_ns and now - cached[1] < DIR_LISTING_TTL:
+            return cached[2]
+        names = frozenset(os.listdir(directory))
+    except OSError:
+        return frozenset()
+    _dir_listings[directory] = (mtime_ns, now, names)
+    return names
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Get (mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_config_file(path: Path) -> Dict[str, Any]:
+    """Parse a YAML config file, reusing a JSON copy while the file is unchanged."""
+    stat = path.stat()
+    signature = [stat.st_mtime_ns, stat.st_size]
+    digest = hashlib.blake2b(str(path.resolve()).encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = CONFIG_CACHE_DIR.expanduser() / f"{digest}.json"
+    
+    try:
+        cached = json.loads(cache_path.read_bytes())
+        if cached["signature"] == signature:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Missing or unreadable cache: parse the YAML
+    
+    import yaml
+    
+    # Parsed from one in-memory buffer; config files are small
+    data = yaml.load(path.read_bytes(), Loader=_yaml_codecs()[0]) or {}
+    
+    # Only cached when JSON gives back the same data (no dates, non-string keys)
+    try:
+        payload = json.dumps({"signature": signature, "data": data})
+        if json.loads(payload)["data"] == data:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                # The copy can hold API keys, so only the owner may read it
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                    cache_file.write(payload)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+    except (OSError, TypeError, ValueError):
+        pass  # The cache is only a speedup
+    
+    return data
 
 
 class LLMConfig(BaseModel):
@@ -20,6 +135,30 @@ class LLMConfig(BaseModel):
     temperature: float = Field(default=0.7, description="Model temperature")
     max_tokens: int = Field(default=4000, description="Maximum tokens")
     timeout: int = Field(default=30, description="Request timeout in seconds")
+    streaming: bool = Field(default=True, description="Stream tokens as they are generated")
+
+
+class AgentConfig(BaseModel):
+    """Agent execution configuration."""
+    tool_concurrency_limit: int = Field(default=4, description="Maximum tool calls run concurrently per agent step")
+    serial_tools: List[str] = Field(
+        default_factory=lambda: ["Python_REPL", "file_write", "shell", "test_runner"],
+        description="Tools that are not thread-safe; their calls in a step run one at a time"
+    )
+    async_tools: bool = Field(default=False, description="Run tools on an event loop (tools must be thread-safe)")
+    direct_answers: bool = Field(default=True, description="Answer queries that need no tools without the agent loop")
+    response_cache: bool = Field(default=False, description="Reuse direct (tool-free) answers for repeated queries")
+    response_cache_file: str = Field(default="~/.cache/aicli/responses.db", description="Response cache database")
+    response_cache_ttl: int = Field(default=3600, description="Seconds a cached response stays valid")
+    max_tool_output_chars: int = Field(default=20000, description="Tool output longer than this is truncated (0 disables)")
+
+
+class MemoryConfig(BaseModel):
+    """Conversation memory configuration."""
+    window_tokens: int = Field(default=2000, description="Token budget for chat history kept in memory")
+    summarize: bool = Field(default=False, description="Summarize history beyond the window instead of dropping it")
+    summarizer_llm: Optional[LLMConfig] = Field(default=None, description="LLM used for summaries (defaults to the main LLM)")
+    max_context_chars: int = Field(default=4000, description="Context entries longer than this are truncated in memory")
 
 
 class ContextConfig(BaseModel):
@@ -85,6 +224,8 @@ class Config(BaseSettings):
     """Main configuration class."""
     
     llm: LLMConfig = Field(default_factory=LLMConfig)
+    agent: AgentConfig = Field(default_factory=AgentConfig)
+    memory: MemoryConfig = Field(default_factory=MemoryConfig)
     context: ContextConfig = Field(default_factory=ContextConfig)
     session: SessionConfig = Field(default_factory=SessionConfig)
     editor: EditorConfig = Field(default_factory=EditorConfig)
@@ -105,14 +246,34 @@ class Config(BaseSettings):
         verbose: bool = False
     ) -> "Config":
         """Load configuration from file and environment."""
+        yaml_file = config_file or cls._find_config_file()
+        
+        # The file, .env and environment are stat'ed and snapshotted rather
+        # than reread, so repeated loads in one process skip validation
+        yaml_signature = _file_signature(yaml_file) if yaml_file else None
+        key = (
+            cls, yaml_file, debug, verbose, os.getcwd(), yaml_signature,
+            _file_signature(Path(".env")), frozenset(os.environ.items())
+        )
+        cached = _load_cache.get(key)
+        if cached is None:
+            cached = cls._load_uncached(yaml_file if yaml_signature else None, debug, verbose)
+            if len(_load_cache) >= LOAD_CACHE_SIZE:
+                del _load_cache[next(iter(_load_cache))]
+            _load_cache[key] = cached
+        
+        # Copied so callers can change their config without touching the cache
+        return cached.model_copy(deep=True)
+    
+    @classmethod
+    def _load_uncached(cls, yaml_file: Optional[Path], debug: bool, verbose: bool) -> "Config":
+        """Build configuration from a config file (if any), environment and flags."""
         # Start with default config
         config_data = {}
         
-        # Load from YAML file if specified or exists
-        yaml_file = config_file or cls._find_config_file()
-        if yaml_file and yaml_file.exists():
-            with open(yaml_file, 'r') as f:
-                config_data = yaml.safe_load(f) or {}
+        # Load from YAML file if one was found
+        if yaml_file:
+            config_data = _read_config_file(yaml_file)
         
         # Create config instance (this will also load from environment)
         config = cls(**config_data)
@@ -131,44 +292,35 @@ class Config(BaseSettings):
     @staticmethod
     def _find_config_file() -> Optional[Path]:
         """Find configuration file in standard locations."""
-        possible_locations = [
-            Path(".claudecli.yaml"),
-            Path(".claudecli.yml"),
-            Path("aicli.yaml"),
-            Path("aicli.yml"),
+        # One (cached) directory listing answers all the working-directory
+        # candidates, instead of a stat per missing file
+        cwd_names = _dir_names(os.getcwd())
+        
+        for name in CWD_CONFIG_FILES:
+            if name in cwd_names:
+                return Path(name)
+        
+        home_locations = [
             Path.home() / ".config" / "aicli" / "config.yaml",
             Path.home() / ".aicli.yaml",
         ]
         
-        for location in possible_locations:
+        for location in home_locations:
             if location.exists():
                 return location
         return None
     
     def _load_api_keys(self):
         """Load API keys from environment variables."""
-        provider_keys = {
-            "openai": "OPENAI_API_KEY",
-            "anthropic": "ANTHROPIC_API_KEY", 
-            "fireworks": "FIREWORKS_API_KEY",
-            "together": "TOGETHER_API_KEY",
-        }
+        provider = self.llm.provider
         
-        if not self.llm.api_key and self.llm.provider in provider_keys:
-            env_key = provider_keys[self.llm.provider]
-            self.llm.api_key = os.getenv(env_key)
-        
-        # Load model from environment if not set
-        provider_models = {
-            "openai": os.getenv("OPENAI_MODEL"),
-            "anthropic": os.getenv("ANTHROPIC_MODEL"),
-            "fireworks": os.getenv("FIREWORKS_MODEL"),
-            "together": os.getenv("TOGETHER_MODEL"),
-            "ollama": os.getenv("OLLAMA_MODEL"),
-        }
+        if not self.llm.api_key and provider in PROVIDER_KEY_ENVS:
+            self.llm.api_key = os.environ.get(PROVIDER_KEY_ENVS[provider])
         
-        if self.llm.provider in provider_models and provider_models[self.llm.provider]:
-            self.llm.model = provider_models[self.llm.provider]
+        # Load model from environment if set; only this provider's variable is read
+        model = os.environ.get(PROVIDER_MODEL_ENVS[provider]) if provider in PROVIDER_MODEL_ENVS else None
+        if model:
+            self.llm.model = model
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary."""
@@ -176,28 +328,40 @@ class Config(BaseSettings):
     
     def to_yaml(self) -> str:
         """Convert config to YAML string."""
-        return yaml.dump(self.to_dict(), default_flow_style=False, indent=2)
+        import yaml
+        
+        return yaml.dump(self.dict(), Dumper=_yaml_codecs()[1], default_flow_style=False, indent=2)
     
     def save(self, file_path: Path):
         """Save configuration to YAML file."""
         with open(file_path, 'w') as f:
             f.write(self.to_yaml())
     
-    def to_rich_table(self) -> Table:
+    def to_rich_table(self) -> "Table":
         """Convert config to Rich table for display."""
+        from rich.table import Table
+        
         table = Table(title="🔧 AICLI Configuration", show_header=True, header_style="bright_cyan bold")
         table.add_column("Section", style="bright_cyan")
         table.add_column("Setting", style="bright_white")
         table.add_column("Value", style="dim")
         
+        # One model walk for all sections instead of one per section
+        data = self.dict()
+        memory = dict(data["memory"])
+        if memory.get("summarizer_llm"):
+            memory["summarizer_llm"] = {k: v for k, v in memory["summarizer_llm"].items() if k != "api_key"}
+        
         sections = {
-            "LLM": self.llm.dict(),
-            "Context": self.context.dict(),
-            "Session": self.session.dict(),
-            "Editor": self.editor.dict(),
-            "Security": self.security.dict(),
-            "Logging": self.logging.dict(),
-            "UI": self.ui.dict(),
+            "LLM": data["llm"],
+            "Agent": data["agent"],
+            "Memory": memory,
+            "Context": data["context"],
+            "Session": data["session"],
+            "Editor": data["editor"],
+            "Security": data["security"],
+            "Logging": data["logging"],
+            "UI": data["ui"],
         }
         
         for section_name, section_data in sections.items():
@@ -7,6 +7,9 @@ from typing import Optional
 from rich.logging import RichHandler
 from rich.console import Console
 
+# Third-party loggers that are too chatty below WARNING
+NOISY_LOGGERS = ("httpx", "httpcore", "urllib3", "requests", "langchain")
+
 
 def setup_logger(
     level: str = "INFO",
@@ -17,9 +20,17 @@ def setup_logger(
     
     # Create logger
     logger = logging.getLogger("aicli")
+    
+    # Already set up the same way (repeated subcommands, tests): keep the handlers
+    setup_key = (level.upper(), log_file, rich_console)
+    if getattr(logger, "_aicli_setup_key", None) == setup_key:
+        return logger
+    
     logger.setLevel(getattr(logging, level.upper(), logging.INFO))
     
-    # Clear existing handlers
+    # Close and clear existing handlers, so file handlers don't leak descriptors
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
     
     # Create console handler with Rich formatting
@@ -63,12 +74,10 @@ def setup_logger(
             logger.warning(f"Could not set up file logging: {e}")
     
     # Suppress noisy third-party loggers
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("requests").setLevel(logging.WARNING)
-    logging.getLogger("langchain").setLevel(logging.WARNING)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
     
+    logger._aicli_setup_key = setup_key
     return logger
 
 
@@ -101,30 +110,39 @@ class AICliLogger:
     
     def tool_execution(self, tool_name: str, input_data: str, output: str):
         """Log tool execution."""
-        self.debug(f"Tool '{tool_name}' executed with input: {input_data[:100]}...")
+        # Checked first so agent loops skip the slicing when debug is off;
+        # %-style arguments leave formatting to the handlers
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self.logger.debug("Tool '%s' executed with input: %s...", tool_name, input_data[:100])
         if len(output) > 200:
-            self.debug(f"Tool output: {output[:200]}...")
+            self.logger.debug("Tool output: %s...", output[:200])
         else:
-            self.debug(f"Tool output: {output}")
+            self.logger.debug("Tool output: %s", output)
     
     def llm_call(self, provider: str, model: str, tokens_used: Optional[int] = None):
         """Log LLM API call."""
-        message = f"LLM call: {provider}/{model}"
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         if tokens_used:
-            message += f" ({tokens_used} tokens)"
-        self.debug(message)
+            self.logger.debug("LLM call: %s/%s (%s tokens)", provider, model, tokens_used)
+        else:
+            self.logger.debug("LLM call: %s/%s", provider, model)
     
     def session_event(self, event: str, session_name: Optional[str] = None):
         """Log session events."""
-        message = f"Session {event}"
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if session_name:
-            message += f": {session_name}"
-        self.info(message)
+            self.logger.info("Session %s: %s", event, session_name)
+        else:
+            self.logger.info("Session %s", event)
     
     def file_operation(self, operation: str, filepath: str, success: bool = True):
         """Log file operations."""
-        status = "✓" if success else "✗"
-        self.info(f"{status} File {operation}: {filepath}")
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("%s File %s: %s", "✓" if success else "✗", operation, filepath)
     
     def error_with_context(self, error: Exception, context: str = ""):
         """Log error with context."""
@@ -4,6 +4,8 @@ Example usage of the Phase 1 conversation management system.
 This demonstrates the key features implemented in Phase 1.
 """
 import asyncio
+import io
+import sys
 from aicli.conversation import (
     ConversationManager,
     ConversationManagerFactory,
@@ -33,9 +35,9 @@ async def demo_basic_usage():
     
     # Get utilization info
     util_info = manager.get_utilization_info()
-    print(f"Token utilization: {util_info['utilization_percent']}")
-    print(f"Current tokens: {util_info['current_tokens']}")
-    print(f"Available tokens: {util_info['available_tokens']}")
+    print(f"Token utilization: {util_info.utilization_percent}")
+    print(f"Current tokens: {util_info.current_tokens}")
+    print(f"Available tokens: {util_info.available_tokens}")
     
     manager.close()
 
@@ -58,7 +60,7 @@ async def demo_auto_compaction():
     util_info = manager.get_utilization_info()
     
     print(f"Final message count: {len(final_state.messages)}")
-    print(f"Final utilization: {util_info['utilization_percent']}")
+    print(f"Final utilization: {util_info.utilization_percent}")
     print("Note: Compaction should have occurred automatically when threshold was reached")
     
     manager.close()
@@ -101,9 +103,11 @@ async def demo_custom_compaction():
     
     # Check what messages were preserved
     messages = manager.get_messages()
-    print("\nPreserved messages:")
+    report = io.StringIO()
+    print("\nPreserved messages:", file=report)
     for msg in messages:
-        print(f"  {msg.role.value}: {msg.content[:50]}...")
+        print(f"  {msg.role.value}: {msg.content[:50]}...", file=report)
+    sys.stdout.write(report.getvalue())
     
     manager.close()
 
@@ -151,14 +155,17 @@ async def demo_message_filtering():
     assistant_messages = manager.get_messages(MessageRole.ASSISTANT)
     recent_messages = manager.get_recent_messages(3)
     
-    print(f"Total messages: {len(manager.get_messages())}")
-    print(f"User messages: {len(user_messages)}")
-    print(f"Assistant messages: {len(assistant_messages)}")
-    print(f"Recent messages: {len(recent_messages)}")
+    # Report built in memory and written once, rather than a write per line
+    report = io.StringIO()
+    print(f"Total messages: {len(manager.get_messages())}", file=report)
+    print(f"User messages: {len(user_messages)}", file=report)
+    print(f"Assistant messages: {len(assistant_messages)}", file=report)
+    print(f"Recent messages: {len(recent_messages)}", file=report)
     
-    print("\nRecent messages:")
+    print("\nRecent messages:", file=report)
     for msg in recent_messages:
-        print(f"  {msg.role.value}: {msg.content}")
+        print(f"  {msg.role.value}: {msg.content}", file=report)
+    sys.stdout.write(report.getvalue())
     
     manager.close()
 
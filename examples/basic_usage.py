@@ -7,13 +7,13 @@ This script demonstrates how to use AICLI programmatically.
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Add the parent directory to the path so we can import aicli
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from aicli.utils.config import Config
-from aicli.agent.core import AIAgent
 
 
 def main():
@@ -60,6 +60,10 @@ def main():
         return
     
     try:
+        # Imported only now: the agent pulls in langchain and the provider SDKs,
+        # which the no-API-key path above never needs
+        from aicli.agent.core import AIAgent
+        
         # Create AI agent
         print("🚀 Creating AI agent...")
         agent = AIAgent(config)
@@ -73,25 +77,34 @@ def main():
             "What's in the README.md file?",
         ]
         
-        for i, query in enumerate(examples, 1):
-            print(f"Example {i}: {query}")
-            print("-" * 50)
-            
-            try:
-                response = agent.execute(query)
-                print(response)
-            except Exception as e:
-                print(f"❌ Error: {e}")
-            
-            print()
+        # Each next example runs on a worker while the user reads the current
+        # answer, so pressing Enter usually shows it without waiting. Only one
+        # query runs at a time, in order, as before.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(agent.execute, examples[0])
             
-            # Ask user if they want to continue
-            if i < len(examples):
+            for i, query in enumerate(examples, 1):
+                print(f"Example {i}: {query}")
+                print("-" * 50)
+                
                 try:
-                    input("Press Enter to continue to next example (or Ctrl+C to stop)...")
-                except KeyboardInterrupt:
-                    print("\n👋 Stopping examples.")
-                    break
+                    response = pending.result()
+                    print(response)
+                except Exception as e:
+                    print(f"❌ Error: {e}")
+                
+                print()
+                
+                # Ask user if they want to continue
+                if i < len(examples):
+                    pending = executor.submit(agent.execute, examples[i])
+                    try:
+                        input("Press Enter to continue to next example (or Ctrl+C to stop)...")
+                    except KeyboardInterrupt:
+                        # A query already underway is left to finish on exit
+                        pending.cancel()
+                        print("\n👋 Stopping examples.")
+                        break
         
         print("✨ Examples completed! Try running 'aicli' for interactive mode.")
         
@@ -23,8 +23,9 @@ def test_navigation():
         "what does this error mean?"
     ]
     
+    add_history = readline.add_history
     for cmd in test_commands:
-        readline.add_history(cmd)
+        add_history(cmd)
     
     print("\n✅ Navigation Features Available:")
     print("   • ↑/↓ arrows: Navigate command history")
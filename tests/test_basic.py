@@ -1,5 +1,6 @@
 """Basic tests for AICLI functionality."""
 
+import os
 import pytest
 from unittest.mock import Mock, patch
 from pathlib import Path
@@ -7,14 +8,28 @@ from pathlib import Path
 from aicli.utils.config import Config, LLMConfig
 from aicli.llm.factory import LLMFactory
 from aicli.tools.registry import ToolRegistry
+from aicli.agent.cache import ResponseCache
+from aicli.agent.executor import ParallelAgentExecutor
+
+
+@pytest.fixture(scope="session")
+def default_config():
+    """Default configuration, built once; tests must copy it before changing it."""
+    return Config()
+
+
+@pytest.fixture(scope="session")
+def default_tool_names(default_config):
+    """Names of the tools the default configuration provides."""
+    return frozenset(tool.name for tool in ToolRegistry.get_tools(default_config))
 
 
 class TestConfig:
     """Test configuration loading and validation."""
     
-    def test_default_config(self):
+    def test_default_config(self, default_config):
         """Test default configuration creation."""
-        config = Config()
+        config = default_config
         assert config.llm.provider == "anthropic"
         assert config.llm.model == "claude-3-sonnet-20240229"
         assert config.context.max_size == 100000
@@ -30,6 +45,47 @@ class TestConfig:
         assert llm_config.provider == "openai"
         assert llm_config.model == "gpt-4"
         assert llm_config.temperature == 0.5
+    
+    def test_load_reparses_changed_config_file(self, tmp_path, monkeypatch):
+        """Test the parsed-config cache is used until the file changes."""
+        monkeypatch.setattr("aicli.utils.config.CONFIG_CACHE_DIR", tmp_path / "cache")
+        config_file = tmp_path / "aicli.yaml"
+        config_file.write_text("agent:\n  tool_concurrency_limit: 7\n")
+        
+        assert Config.load(config_file).agent.tool_concurrency_limit == 7
+        assert len(list((tmp_path / "cache").glob("*.json"))) == 1
+        assert Config.load(config_file).agent.tool_concurrency_limit == 7
+        
+        config_file.write_text("agent:\n  tool_concurrency_limit: 12\n")
+        assert Config.load(config_file).agent.tool_concurrency_limit == 12
+    
+    def test_load_returns_independent_copies(self, tmp_path, monkeypatch):
+        """Test repeated loads are isolated from each other and see env changes."""
+        monkeypatch.setattr("aicli.utils.config.CONFIG_CACHE_DIR", tmp_path / "cache")
+        config_file = tmp_path / "aicli.yaml"
+        config_file.write_text("llm:\n  provider: openai\n")
+        monkeypatch.setenv("OPENAI_MODEL", "gpt-4")
+        
+        first = Config.load(config_file)
+        first.llm.temperature = 0.9
+        second = Config.load(config_file)
+        assert second is not first
+        assert second.llm.temperature != 0.9
+        assert second.llm.model == "gpt-4"
+        
+        monkeypatch.setenv("OPENAI_MODEL", "gpt-4o")
+        assert Config.load(config_file).llm.model == "gpt-4o"
+    
+    def test_parsed_config_cache_is_private(self, tmp_path, monkeypatch):
+        """Test the JSON copy of a config holding secrets is readable by the owner only."""
+        import stat
+        monkeypatch.setattr("aicli.utils.config.CONFIG_CACHE_DIR", tmp_path / "cache")
+        config_file = tmp_path / "aicli.yaml"
+        config_file.write_text("llm:\n  api_key: sk-secret\n")
+        
+        assert Config.load(config_file).llm.api_key == "sk-secret"
+        cache_file, = (tmp_path / "cache").glob("*.json")
+        assert stat.S_IMODE(cache_file.stat().st_mode) == 0o600
 
 
 class TestLLMFactory:
@@ -65,6 +121,15 @@ class TestLLMFactory:
             # Expected to fail without proper API setup
             pass
     
+    def test_create_llm_reuses_instances(self):
+        """Test that LLMs are built once per distinct configuration."""
+        first = LLMFactory.create_llm(LLMConfig(provider="openai", model="gpt-4", api_key="test-key"))
+        second = LLMFactory.create_llm(LLMConfig(provider="openai", model="gpt-4", api_key="test-key"))
+        other = LLMFactory.create_llm(LLMConfig(provider="openai", model="gpt-3.5-turbo", api_key="test-key"))
+        
+        assert first is second
+        assert first is not other
+    
     def test_unsupported_provider(self):
         """Test error handling for unsupported provider."""
         config = LLMConfig(provider="unsupported")
@@ -76,18 +141,14 @@ class TestLLMFactory:
 class TestToolRegistry:
     """Test tool registry functionality."""
     
-    def test_get_tools(self):
+    def test_get_tools(self, default_tool_names):
         """Test getting tools from registry."""
-        config = Config()
-        tools = ToolRegistry.get_tools(config)
-        
-        assert len(tools) > 0
+        assert len(default_tool_names) > 0
         
         # Check that basic tools are included
-        tool_names = [tool.name for tool in tools]
-        assert "file_read" in tool_names
-        assert "file_search" in tool_names
-        assert "git" in tool_names
+        assert "file_read" in default_tool_names
+        assert "file_search" in default_tool_names
+        assert "git" in default_tool_names
     
     def test_get_tool_info(self):
         """Test getting tool information."""
@@ -103,22 +164,25 @@ class TestToolRegistry:
         assert "description" in file_read_info
         assert "category" in file_read_info
     
-    def test_shell_tools_disabled_by_default(self):
-        """Test that shell tools are disabled by default."""
-        config = Config()
-        tools = ToolRegistry.get_tools(config)
+    def test_get_tools_reuses_instances(self):
+        """Test that tools are built once per tool configuration."""
+        first = ToolRegistry.get_tools(Config())
+        second = ToolRegistry.get_tools(Config())
         
-        tool_names = [tool.name for tool in tools]
+        assert first is not second
+        assert all(a is b for a, b in zip(first, second))
+    
+    def test_shell_tools_disabled_by_default(self, default_tool_names):
+        """Test that shell tools are disabled by default."""
         # Shell tools should not be included by default
-        assert "shell" not in tool_names
+        assert "shell" not in default_tool_names
     
-    def test_shell_tools_enabled_when_configured(self):
+    def test_shell_tools_enabled_when_configured(self, default_config):
         """Test that shell tools are included when enabled."""
-        config = Config()
-        config.security.enable_shell_tools = True
+        security = default_config.security.model_copy(update={"enable_shell_tools": True})
+        config = default_config.model_copy(update={"security": security})
         
-        tools = ToolRegistry.get_tools(config)
-        tool_names = [tool.name for tool in tools]
+        tool_names = {tool.name for tool in ToolRegistry.get_tools(config)}
         
         # Shell tools should be included when enabled
         assert "shell" in tool_names
@@ -142,7 +206,587 @@ class TestFileOperations:
         tool = FileSearchTool()
         assert tool.name == "file_search"
         assert "search" in tool.description.lower()
+    
+    def test_content_search_reports_first_match(self, tmp_path, monkeypatch):
+        """Test that content search finds the first matching line case-insensitively."""
+        from aicli.tools.file_tools import FileSearchTool
+        
+        (tmp_path / "app.py").write_text("import os\n\ndef Main():\n    main()\n")
+        (tmp_path / "empty.py").write_text("")
+        monkeypatch.chdir(tmp_path)
+        
+        results = FileSearchTool()._search_by_content("def main")
+        assert results == [{"file": "./app.py", "line": 3, "context": "def Main():"}]
+    
+    def test_content_search_folds_non_ascii_case(self, tmp_path, monkeypatch):
+        """Test that non-ASCII queries still match case-insensitively."""
+        from aicli.tools.file_tools import FileSearchTool
+        
+        (tmp_path / "notes.txt").write_text("intro\nÜBER alles\n", encoding="utf-8")
+        monkeypatch.chdir(tmp_path)
+        
+        results = FileSearchTool()._search_by_content("über")
+        assert results == [{"file": "./notes.txt", "line": 2, "context": "ÜBER alles"}]
+    
+    def test_content_search_sniffs_binary_files(self, tmp_path, monkeypatch):
+        """Test that files are classified by content rather than extension."""
+        from aicli.tools.file_tools import FileSearchTool
+        
+        (tmp_path / "Makefile").write_text("build:\n\tmake all\n")
+        (tmp_path / "blob.txt").write_bytes(b"make all\x00\x01")
+        monkeypatch.chdir(tmp_path)
+        
+        results = FileSearchTool()._search_by_content("make all")
+        assert [result["file"] for result in results] == ["./Makefile"]
+    
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+    def test_content_search_skips_special_files(self, tmp_path, monkeypatch):
+        """Test that FIFOs are not opened, since reading one blocks forever."""
+        from aicli.tools.file_tools import FileSearchTool
+        
+        (tmp_path / "notes.txt").write_text("pipe dream\n")
+        os.mkfifo(tmp_path / "pipe")
+        monkeypatch.chdir(tmp_path)
+        
+        results = FileSearchTool()._search_by_content("pipe")
+        assert [result["file"] for result in results] == ["./notes.txt"]
+    
+    def test_concurrent_writes_to_one_file(self, tmp_path, monkeypatch):
+        """Test that parallel writes each swap in a complete file and keep its mode."""
+        import stat
+        from concurrent.futures import ThreadPoolExecutor
+        from aicli.tools.file_tools import FileWriteTool
+        
+        monkeypatch.chdir(tmp_path)
+        target = tmp_path / "out.txt"
+        target.write_text("old")
+        target.chmod(0o640)
+        
+        tool = FileWriteTool()
+        contents = [str(i) * 1000 for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda content: tool._run(f"out.txt|||{content}"), contents))
+        
+        assert all(result == "Successfully wrote to out.txt" for result in results)
+        assert target.read_text() in contents
+        assert stat.S_IMODE(target.stat().st_mode) == 0o640
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestGitTools:
+    """Test git tool result caching."""
+    
+    def test_cached_log_refreshes_after_commit(self, tmp_path, monkeypatch):
+        """Test that cached git results are invalidated when HEAD moves."""
+        import subprocess
+        from aicli.tools.git_tools import GitResultCache
+        
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                check=True, capture_output=True
+            )
+        
+        monkeypatch.chdir(tmp_path)
+        git("init", "-q")
+        git("commit", "-q", "--allow-empty", "-m", "first")
+        
+        cache = GitResultCache()
+        command = ["git", "log", "--format=%s"]
+        first = cache.run(command, timeout=10)
+        assert cache.run(command, timeout=10) is first
+        
+        git("commit", "-q", "--allow-empty", "-m", "second")
+        assert cache.run(command, timeout=10).stdout.split() == ["second", "first"]
+    
+    def test_cached_log_refreshes_after_fetch(self, tmp_path, monkeypatch):
+        """Test that a fetch updating a loose remote ref invalidates cached results."""
+        import subprocess
+        from aicli.tools.git_tools import GitResultCache
+        
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                check=True, capture_output=True
+            )
+        
+        upstream = tmp_path / "upstream"
+        git("init", "-q", "-b", "main", str(upstream))
+        git("-C", str(upstream), "commit", "-q", "--allow-empty", "-m", "first")
+        git("clone", "-q", str(upstream), str(tmp_path / "clone"))
+        monkeypatch.chdir(tmp_path / "clone")
+        
+        cache = GitResultCache()
+        command = ["git", "log", "--format=%s", "origin/main"]
+        assert cache.run(command, timeout=10).stdout.split() == ["first"]
+        
+        git("-C", str(upstream), "commit", "-q", "--allow-empty", "-m", "second")
+        git("fetch", "-q")
+        assert cache.run(command, timeout=10).stdout.split() == ["second", "first"]
+    
+    def test_cache_separates_working_directories(self, tmp_path, monkeypatch):
+        """Test that cwd-relative results aren't shared between subdirectories."""
+        import subprocess
+        from aicli.tools.git_tools import GitResultCache
+        
+        (tmp_path / "sub").mkdir()
+        monkeypatch.chdir(tmp_path)
+        subprocess.run(["git", "init", "-q"], check=True, capture_output=True)
+        
+        cache = GitResultCache()
+        command = ["git", "rev-parse", "--show-prefix"]
+        assert cache.run(command, timeout=10).stdout == "\n"
+        monkeypatch.chdir(tmp_path / "sub")
+        assert cache.run(command, timeout=10).stdout == "sub/\n"
+    
+    @staticmethod
+    def _blob_repo(tmp_path, monkeypatch):
+        """Create a repo with a.txt and src/b.py committed, and chdir into it."""
+        import subprocess
+        
+        (tmp_path / "src").mkdir()
+        (tmp_path / "a.txt").write_text("hello\n")
+        (tmp_path / "src" / "b.py").write_text("x = 1\n")
+        monkeypatch.chdir(tmp_path)
+        for args in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "first"]):
+            subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                check=True, capture_output=True
+            )
+    
+    def test_show_blob_uses_object_reader(self, tmp_path, monkeypatch):
+        """Test that "show <rev>:<path>" of a blob is answered by cat-file."""
+        from aicli.tools.git_tools import GitTool
+        
+        self._blob_repo(tmp_path, monkeypatch)
+        tool = GitTool()
+        try:
+            assert tool._run("show HEAD:a.txt") == "Git show HEAD:a.txt:\\nhello"
+            assert tool._reader._proc is not None
+        finally:
+            tool.close()
+    
+    def test_show_falls_back_for_missing_paths_and_trees(self, tmp_path, monkeypatch):
+        """Test that missing paths and trees keep git show's own output."""
+        from aicli.tools.git_tools import GitObjectReader, GitTool
+        
+        self._blob_repo(tmp_path, monkeypatch)
+        reader = GitObjectReader()
+        tool = GitTool()
+        try:
+            assert reader.read("HEAD:nope.txt") is None
+            assert reader.read("HEAD:src")[0] == "tree"
+            
+            missing = tool._run("show HEAD:nope.txt")
+            assert missing.startswith("Git command failed:")
+            assert "nope.txt" in missing and "does not exist" in missing
+            assert tool._run("show HEAD:src") == "Git show HEAD:src:\\ntree HEAD:src\n\nb.py"
+        finally:
+            reader.close()
+            tool.close()
+    
+    def test_object_reader_restarts_after_child_dies(self, tmp_path, monkeypatch):
+        """Test that a killed cat-file process is replaced on a later read."""
+        from aicli.tools.git_tools import GitTool
+        
+        self._blob_repo(tmp_path, monkeypatch)
+        tool = GitTool()
+        try:
+            assert tool._run("show HEAD:src/b.py") == "Git show HEAD:src/b.py:\\nx = 1"
+            first = tool._reader._proc
+            first.kill()
+            
+            # Whether this read notices the dead process or falls back to
+            # git show, the answer is unchanged and the next read restarts
+            assert tool._run("show HEAD:src/b.py") == "Git show HEAD:src/b.py:\\nx = 1"
+            assert tool._run("show HEAD:a.txt") == "Git show HEAD:a.txt:\\nhello"
+            assert tool._reader._proc is not None and tool._reader._proc is not first
+            assert tool._reader._proc.poll() is None
+        finally:
+            tool.close()
+
+
+class TestShellTools:
+    """Test the shell and test-runner tools."""
+    
+    def test_test_runner_returns_despite_background_children(self, monkeypatch):
+        """Test that a child left holding the output pipes doesn't hang the run."""
+        import sys
+        import time
+        from aicli.tools.shell_tools import TestRunnerTool
+        
+        monkeypatch.setattr("aicli.tools.shell_tools.READER_DRAIN_TIMEOUT", 0.5)
+        script = (
+            "import subprocess, sys; "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+            "print('started')"
+        )
+        command = f'python -c "{script}"'
+        
+        start = time.monotonic()
+        output = TestRunnerTool()._run(command)
+        assert time.monotonic() - start < 10
+        assert "started" in output
+        assert "Tests passed" in output
+
+
+class TestParallelAgentExecutor:
+    """Test concurrent tool dispatch in the agent executor."""
+    
+    @staticmethod
+    def _make_executor(tool_func, **kwargs):
+        """Build an executor around an agent that calls two tools at once."""
+        from langchain.agents import BaseMultiActionAgent
+        from langchain_core.agents import AgentAction, AgentFinish
+        from langchain_core.tools import Tool
+        
+        class TwoActionAgent(BaseMultiActionAgent):
+            @property
+            def input_keys(self):
+                return ["input"]
+            
+            def plan(self, intermediate_steps, callbacks=None, **kwargs):
+                if intermediate_steps:
+                    return AgentFinish({"output": "done"}, "")
+                return [AgentAction("probe", "a", ""), AgentAction("probe", "b", "")]
+            
+            async def aplan(self, intermediate_steps, callbacks=None, **kwargs):
+                return self.plan(intermediate_steps, callbacks, **kwargs)
+        
+        tool = Tool(name="probe", func=tool_func, description="Test tool")
+        return ParallelAgentExecutor(
+            agent=TwoActionAgent(),
+            tools=[tool],
+            return_intermediate_steps=True,
+            **kwargs
+        )
+    
+    def test_actions_run_concurrently(self):
+        """Test that actions of one step overlap in time."""
+        import threading
+        
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def probe(value):
+            barrier.wait()  # Only passes if both calls are in flight together
+            return value.upper()
+        
+        result = self._make_executor(probe).invoke({"input": "go"})
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert observations == ["A", "B"]
+    
+    def test_async_actions_run_concurrently(self):
+        """Test that the async path also overlaps a step's actions."""
+        import asyncio
+        import threading
+        
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def probe(value):
+            barrier.wait()
+            return value.upper()
+        
+        executor = self._make_executor(probe)
+        result = asyncio.run(executor.ainvoke({"input": "go"}))
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert observations == ["A", "B"]
+    
+    def test_failing_tool_does_not_abort_batch(self):
+        """Test that a tool error becomes an observation."""
+        def probe(value):
+            if value == "a":
+                raise RuntimeError("boom")
+            return value
+        
+        result = self._make_executor(probe).invoke({"input": "go"})
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert "boom" in observations[0]
+        assert observations[1] == "b"
+    
+    def test_long_observations_are_truncated(self):
+        """Test that oversized tool output is capped."""
+        executor = self._make_executor(lambda value: value * 100, max_observation_chars=10)
+        result = executor.invoke({"input": "go"})
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert observations[0].startswith("a" * 10 + "\n... (90 more characters omitted")
+    
+    def test_serial_tools_never_overlap(self):
+        """Test that calls to a tool marked thread-unsafe run one at a time."""
+        import asyncio
+        import threading
+        import time
+        
+        active = []
+        overlaps = []
+        lock = threading.Lock()
+        
+        def probe(value):
+            with lock:
+                active.append(value)
+                overlaps.append(len(active) > 1)
+            time.sleep(0.05)
+            with lock:
+                active.remove(value)
+            return value
+        
+        executor = self._make_executor(probe, serial_tools=frozenset({"probe"}))
+        for result in (executor.invoke({"input": "go"}), asyncio.run(executor.ainvoke({"input": "go"}))):
+            assert [obs for _, obs in result["intermediate_steps"]] == ["a", "b"]
+        assert overlaps == [False] * 4
+
+
+class TestResponseCache:
+    """Test the exact-match response cache."""
+    
+    def test_round_trip(self, tmp_path):
+        """Test storing and retrieving a response."""
+        cache = ResponseCache(str(tmp_path / "responses.db"))
+        key = ResponseCache.make_key("system", "what is a decorator?")
+        
+        assert cache.get(key) is None
+        cache.put(key, "A function wrapper.", tokens=42)
+        assert cache.get(key) == ("A function wrapper.", 42)
+        
+        assert cache.clear() == 1
+        assert cache.get(key) is None
+    
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Test that entries older than the TTL are not returned."""
+        cache = ResponseCache(str(tmp_path / "responses.db"), ttl=60)
+        key = ResponseCache.make_key("query")
+        cache.put(key, "answer")
+        
+        with patch("aicli.agent.cache.time.time", return_value=10**12):
+            assert cache.get(key) is None
+    
+    def test_key_separates_parts(self):
+        """Test that part boundaries are part of the key."""
+        assert ResponseCache.make_key("ab", "c") != ResponseCache.make_key("a", "bc")
+    
+    def test_agent_key_covers_history_and_directory(self, tmp_path, monkeypatch):
+        """Test that the agent's key changes with the conversation and the project."""
+        from langchain_core.language_models import FakeListLLM
+        from aicli.agent.core import AIAgent
+        
+        config = Config()
+        assert not config.agent.response_cache
+        config.agent.response_cache = True
+        config.agent.response_cache_file = str(tmp_path / "responses.db")
+        with patch("aicli.agent.core.LLMFactory.create_llm", return_value=FakeListLLM(responses=["ok"])):
+            agent = AIAgent(config, tools=[])
+        
+        monkeypatch.chdir(tmp_path)
+        first = agent._response_cache_key(agent._direct_messages("what is a decorator?"))
+        agent.memory.chat_memory.add_user_message("we use attrs here")
+        with_history = agent._response_cache_key(agent._direct_messages("what is a decorator?"))
+        monkeypatch.chdir(tmp_path.parent)
+        other_project = agent._response_cache_key(agent._direct_messages("what is a decorator?"))
+        
+        assert len({first, with_history, other_project}) == 3
+
+
+class TestDirectAnswerRouting:
+    """Test which queries bypass the agent loop."""
+    
+    def test_informational_queries_skip_tools(self):
+        """Test that general questions are not routed to tools."""
+        from aicli.agent.core import _TOOL_INTENT_RE
+        
+        assert not _TOOL_INTENT_RE.search("What is a decorator?")
+        assert not _TOOL_INTENT_RE.search("How do I sort a dict in Python?")
+    
+    def test_project_queries_use_tools(self):
+        """Test that queries about files or commands go through the agent."""
+        from aicli.agent.core import _TOOL_INTENT_RE
+        
+        assert _TOOL_INTENT_RE.search("show me main.py")
+        assert _TOOL_INTENT_RE.search("run the tests")
+        assert _TOOL_INTENT_RE.search("what does aicli/cli/main.py do")
+    
+    def test_agent_input_carries_context_and_history(self):
+        """Test that the agent path sees project context and earlier turns."""
+        from langchain_core.language_models import FakeListLLM
+        from aicli.agent.core import AIAgent
+        
+        with patch("aicli.agent.core.LLMFactory.create_llm", return_value=FakeListLLM(responses=["ok"])):
+            agent = AIAgent(Config(), tools=[])
+        agent.add_context("def main(): ...", "file", key="main.py")
+        agent.memory.chat_memory.add_user_message("we use attrs here")
+        
+        agent_input = agent._prepare_input("refactor main.py", None)
+        assert "def main(): ..." in agent_input["project_context"]
+        assert "we use attrs here" in agent_input["chat_history"]
+        assert agent.memory.chat_memory.messages[0].content == "we use attrs here"
+    
+    def test_agents_sharing_memory_share_context(self):
+        """Test that project context added through one pooled agent reaches another."""
+        from langchain_core.language_models import FakeListLLM
+        from aicli.agent.core import AIAgent
+        
+        with patch("aicli.agent.core.LLMFactory.create_llm", return_value=FakeListLLM(responses=["ok"])):
+            first = AIAgent(Config(), tools=[])
+            second = AIAgent(Config(), memory=first.memory, tools=[], context_entries=first.context_entries)
+        first.add_context("def main(): ...", "file", key="main.py")
+        
+        assert "def main(): ..." in second._prepare_input("refactor main.py", None)["project_context"]
+        second.clear_memory()
+        assert not first._project_context()
+
+
+class TestConversationManager:
+    """Test conversation state management and compaction."""
+    
+    def test_messages_flow_through_middleware(self):
+        """Test that dispatched messages reach the state."""
+        import asyncio
+        from aicli.conversation import ConversationManagerFactory, MessageRole
+        
+        async def run():
+            manager = ConversationManagerFactory.create_default(max_tokens=4000)
+            try:
+                await manager.add_user_message("hello there")
+                await manager.add_assistant_message("hi")
+                return manager.get_messages(MessageRole.USER), manager.current_state
+            finally:
+                manager.close()
+        
+        user_messages, state = asyncio.run(run())
+        assert [msg.content for msg in user_messages] == ["hello there"]
+        assert len(state.messages) == 2
+        assert state.context_window.current_tokens > 0
+    
+    def test_auto_compaction_keeps_window_under_threshold(self):
+        """Test that a full context window is compacted automatically."""
+        import asyncio
+        from aicli.conversation import ConversationManagerFactory
+        
+        async def run():
+            manager = ConversationManagerFactory.create_default(max_tokens=200)
+            try:
+                for i in range(30):
+                    await manager.add_user_message(f"message number {i} " * 3)
+                return manager.current_state
+            finally:
+                manager.close()
+        
+        state = asyncio.run(run())
+        assert len(state.messages) < 30
+        assert not state.context_window.needs_compaction
+    
+    def test_digest_compaction_condenses_older_messages(self):
+        """Test that the digest strategy folds older turns into one system message."""
+        import asyncio
+        from aicli.conversation import ConversationManagerFactory, MessageRole
+        
+        async def run():
+            manager = ConversationManagerFactory.create_with_strategy(
+                max_tokens=600, strategy_name="digest", preserve_recent=4
+            )
+            try:
+                for i in range(40):
+                    await manager.add_user_message(f"question {i} about the project layout\nwith details")
+                    await manager.add_assistant_message(f"answer {i} describing the modules")
+                return manager.current_state
+            finally:
+                manager.close()
+        
+        state = asyncio.run(run())
+        digests = [msg for msg in state.messages if "digest_of" in msg.metadata]
+        assert len(digests) == 1
+        assert digests[0].role == MessageRole.SYSTEM
+        assert "with details" not in digests[0].content
+        assert state.messages[-1].content == "answer 39 describing the modules"
+        assert not state.context_window.needs_compaction
+    
+    def test_digest_window_keeps_recent_turns(self):
+        """Test that the digest window keeps that many whole turns verbatim."""
+        import asyncio
+        from aicli.conversation import ConversationManagerFactory, MessageRole
+        
+        async def run():
+            manager = ConversationManagerFactory.create_with_strategy(
+                max_tokens=600, strategy_name="digest", window=3
+            )
+            try:
+                for i in range(40):
+                    await manager.add_user_message(f"question {i} about the project layout")
+                    await manager.add_assistant_message(f"answer {i} describing the modules")
+                return manager.current_state
+            finally:
+                manager.close()
+        
+        state = asyncio.run(run())
+        verbatim = [msg for msg in state.messages if "digest_of" not in msg.metadata]
+        # Only whole turns are kept, so what follows the digest opens with a question
+        assert len(verbatim) >= 6 and len(verbatim) % 2 == 0
+        assert verbatim[0].role == MessageRole.USER
+        assert not state.context_window.needs_compaction    
+    def test_token_cache_is_bounded(self, monkeypatch):
+        """Test that memoized token counts evict the least recently used."""
+        from aicli.conversation import context_window
+        from aicli.conversation.context_window import ConversationCompactor, SimpleTokenCounter
+        from aicli.conversation.state import Message, MessageRole
+        
+        monkeypatch.setattr(context_window, "TOKEN_CACHE_SIZE", 3)
+        compactor = ConversationCompactor(SimpleTokenCounter())
+        messages = [Message.create(MessageRole.USER, f"message {i}") for i in range(5)]
+        for msg in messages[:3]:
+            compactor.count_message_tokens(msg)
+        compactor.count_message_tokens(messages[0])
+        for msg in messages[3:]:
+            compactor.count_message_tokens(msg)
+        
+        assert len(compactor._token_cache) == 3
+        assert id(messages[0]) in compactor._token_cache
+        assert id(messages[1]) not in compactor._token_cache
+    
+    def test_concurrent_changes_notify_once(self):
+        """Test that a burst of changes reaches subscribers as one notification."""
+        import asyncio
+        from aicli.conversation import ConversationManagerFactory
+        
+        seen = []
+        
+        async def run():
+            manager = ConversationManagerFactory.create_default(max_tokens=4000)
+            manager.subscribe_to_changes(lambda state: seen.append(len(state.messages)))
+            try:
+                await asyncio.gather(*(manager.add_user_message(f"message {i}") for i in range(5)))
+                manager.flush_notifications()
+                await manager.add_user_message("one more")
+                manager.flush_notifications()
+            finally:
+                manager.close()
+        
+        asyncio.run(run())
+        assert seen == [5, 6]
+    
+    def test_message_list_branches_do_not_interfere(self):
+        """Test that appending to an older state leaves newer states intact."""
+        from aicli.conversation import MessageList, Message, MessageRole
+        
+        base = MessageList().append(Message.create(MessageRole.USER, "a"))
+        first = base.append(Message.create(MessageRole.USER, "b"))
+        second = base.append(Message.create(MessageRole.USER, "c"))
+        
+        assert [msg.content for msg in base] == ["a"]
+        assert [msg.content for msg in first] == ["a", "b"]
+        assert [msg.content for msg in second] == ["a", "c"]
+        assert first[-1:] == [first[1]]
+    
+    def test_role_index_branches_do_not_interfere(self):
+        """Test that the shared role index stays correct for diverging states."""
+        from aicli.conversation import ConversationState, Message, MessageRole
+        
+        base = ConversationState.create().add_message(Message.create(MessageRole.USER, "a"))
+        first = base.add_message(Message.create(MessageRole.USER, "b"))
+        second = base.add_message(Message.create(MessageRole.ASSISTANT, "c"))
+        
+        assert list(base.messages_by_role[MessageRole.USER]) == [0]
+        assert list(first.messages_by_role[MessageRole.USER]) == [0, 1]
+        assert list(second.messages_by_role[MessageRole.USER]) == [0]
+        assert list(second.messages_by_role[MessageRole.ASSISTANT]) == [1]
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])